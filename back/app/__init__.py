@@ -1,13 +1,14 @@
 import os
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from app.config import config_by_name
+from app.utils.database import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 bcrypt = Bcrypt()
 
@@ -15,11 +16,77 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
     
-    # Initialize extensions with app
-    db.init_app(app)
+    # Take the client address from X-Forwarded-For set by trusted proxies
+    if app.config['TRUSTED_PROXY_COUNT']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=app.config['TRUSTED_PROXY_COUNT'],
+            x_proto=app.config['TRUSTED_PROXY_COUNT']
+        )
+    
+    # Non-blocking logging with per-request correlation ids
+    from app.utils.log import configure_logging
+    configure_logging(app)
+    
+    # Initialize extensions with app; engine options and SQLite pragmas per environment
+    from app.utils.database import configure_database, routing_stats
+    configure_database(app, db)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     
+    # Size the in-process caches for this environment
+    from app.utils.cache import principal_cache, phone_lookup_cache
+    principal_cache.configure(
+        maxsize=app.config['AUTH_CACHE_MAX_SIZE'],
+        ttl=app.config['AUTH_CACHE_TTL']
+    )
+    phone_lookup_cache.configure(
+        maxsize=app.config['PHONE_LOOKUP_CACHE_MAX_USERS'],
+        ttl=app.config['PHONE_LOOKUP_CACHE_TTL']
+    )
+    
+    # Bound the CPU that bcrypt can take away from other requests
+    from app.utils.hashing import password_hasher
+    password_hasher.configure(
+        max_workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+    
+    # Per-IP and per-account limits on login attempts
+    from app.utils.ratelimit import login_admission
+    login_admission.configure(
+        ip_rate=app.config['LOGIN_IP_RATE'],
+        ip_burst=app.config['LOGIN_IP_BURST'],
+        account_rate=app.config['LOGIN_ACCOUNT_RATE'],
+        account_burst=app.config['LOGIN_ACCOUNT_BURST'],
+        max_keys=app.config['LOGIN_RATE_LIMIT_MAX_KEYS'],
+        max_verifications=app.config['LOGIN_MAX_VERIFICATIONS']
+    )
+    
+    # Background resizing of uploaded profile pictures
+    from app.utils.images import image_processor, pick_variant
+    from app.utils.uploads import send_upload
+    image_processor.configure(
+        max_workers=app.config['IMAGE_PROCESSING_WORKERS'],
+        sizes=app.config['PROFILE_PICTURE_SIZES'],
+        preferred=app.config['PROFILE_PICTURE_FORMAT'],
+        quality=app.config['PROFILE_PICTURE_QUALITY']
+    )
+    
+    # Per-worker fanout for the contacts change feed
+    from app.utils.events import contact_events
+    contact_events.configure(
+        replay_size=app.config['CONTACT_EVENTS_REPLAY_SIZE'],
+        max_users=app.config['CONTACT_EVENTS_REPLAY_MAX_USERS'],
+        max_connections=app.config['CONTACT_EVENTS_MAX_CONNECTIONS'],
+        queue_size=app.config['CONTACT_EVENTS_QUEUE_SIZE']
+    )
+    
+    # Negotiated gzip/brotli compression of text responses
+    from app.utils.compression import configure_compression, compression_stats
+    configure_compression(app)
+    
     # Updated CORS configuration with more permissive settings
     CORS(app, 
          resources={r"/api/*": {"origins": "*"}},
@@ -30,17 +97,32 @@ def create_app(config_name='development'):
     # Import and register blueprints - ONLY the simple ones that exist
     from app.controllers.simple_auth import simple_auth_bp
     from app.controllers.simple_contacts import simple_contacts_bp
+    from app.controllers.batch import batch_bp
     
     # Register only the existing blueprints
     app.register_blueprint(simple_auth_bp, url_prefix='/api/simple_auth')
     app.register_blueprint(simple_contacts_bp, url_prefix='/api/simple_contacts')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
     
     # Route to serve uploaded profile pictures
-    @app.route('/uploads/<filename>')
+    @app.route('/uploads/<path:filename>')
     def uploaded_file(filename):
-        """Serve uploaded files (profile pictures)"""
+        """
+        Serve uploaded files (profile pictures). `size` picks the smallest
+        resized variant that covers it, falling back to the original
+        (briefly cacheable) while variants are still being generated
+        """
         upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
-        return send_from_directory(upload_folder, filename)
+        size = request.args.get('size', type=int)
+        if size and size > 0:
+            variant = pick_variant(
+                os.path.join(app.root_path, upload_folder), filename, size,
+                app.config['PROFILE_PICTURE_SIZES'], app.config['PROFILE_PICTURE_FORMAT']
+            )
+            if not variant:
+                return send_upload(filename, immutable=False)
+            filename = variant
+        return send_upload(filename)
     
     # Route to test image serving
     @app.route('/api/test-upload')
@@ -60,17 +142,39 @@ def create_app(config_name='development'):
             'max_content_length': app.config.get('MAX_CONTENT_LENGTH', 'Not set')
         }
     
+    # Route to expose in-process performance counters
+    @app.route('/api/metrics')
+    def metrics():
+        """Report cache, password hashing, login admission, compression, image, database routing and event feed counters for this worker"""
+        return {
+            'auth_cache': principal_cache.stats(),
+            'phone_lookup_cache': phone_lookup_cache.stats(),
+            'password_hashing': password_hasher.stats(),
+            'login_admission': login_admission.stats(),
+            'compression': compression_stats.stats(),
+            'image_processing': image_processor.stats(),
+            'database_routing': routing_stats(),
+            'contact_events': contact_events.stats()
+        }
+    
+    # Maintenance CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Shell context processor
     @app.shell_context_processor
     def shell_context():
         return {
             'db': db,
             'User': User,
-            'Contact': Contact
+            'Contact': Contact,
+            'ContactPhone': ContactPhone,
+            'Upload': Upload
         }
     
     # Import models for migrations
     from app.models.user import User
-    from app.models.contact import Contact
+    from app.models.contact import Contact, ContactPhone
+    from app.models.upload import Upload
     
     return app
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import click
+from flask import current_app
+from app import db
+from app.models.contact import ContactPhone
+from app.models.upload import Upload
+from app.models.user import User
+from app.utils.database import REPLICA_BIND
+from app.utils.images import Image, make_variants, variant_filenames
+from app.utils.storage import remove_stored, store_stream
+
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI"""
+
+    @app.cli.command('repair-contact-counts')
+    def repair_contact_counts():
+        """Recompute users.contact_count from the contacts table"""
+        fixed = User.recount_contacts()
+        click.echo(f'Repaired contact_count for {fixed} user(s)')
+
+    @app.cli.command('backfill-contact-phones')
+    @click.option('--batch-size', default=1000, show_default=True, help='Contacts per transaction')
+    def backfill_contact_phones(batch_size):
+        """Populate contact_phones from the JSON phone_numbers column"""
+        processed = ContactPhone.backfill(batch_size)
+        click.echo(f'Backfilled phone numbers for {processed} contact(s)')
+
+    @app.cli.command('migrate-uploads')
+    @click.option('--batch-size', default=100, show_default=True, help='Users per transaction')
+    def migrate_uploads(batch_size):
+        """Move flat-folder profile pictures into content-addressed storage"""
+        root = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+        sizes = current_app.config['PROFILE_PICTURE_SIZES']
+
+        def store(legacy):
+            source = os.path.join(root, legacy)
+            if not os.path.isfile(source):
+                click.echo(f'Missing file {legacy}, left as is', err=True)
+                return None
+            with open(source, 'rb') as stream:
+                path, size, created = store_stream(stream, legacy.rsplit('.', 1)[-1], root)
+            if created and Image is not None:
+                try:
+                    make_variants(
+                        os.path.join(root, path), sizes,
+                        current_app.config['PROFILE_PICTURE_FORMAT'],
+                        current_app.config['PROFILE_PICTURE_QUALITY']
+                    )
+                except Exception as e:
+                    click.echo(f'Could not create variants of {legacy}: {e}', err=True)
+            return path, size
+
+        migrated, missing, legacy_names = Upload.migrate_legacy(root, store, batch_size)
+        # Every user referencing these names now points at the stored copy
+        for legacy in legacy_names:
+            remove_stored(root, legacy, variant_filenames(legacy, sizes))
+        click.echo(f'Migrated {migrated} profile picture(s), removed {len(legacy_names)} legacy file(s); {missing} missing')
+
+    @app.cli.command('prune-uploads')
+    def prune_uploads():
+        """Delete stored uploads that nothing references any more"""
+        root = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+        sizes = current_app.config['PROFILE_PICTURE_SIZES']
+        removed = Upload.prune(root, lambda path: variant_filenames(path, sizes))
+        click.echo(f'Removed {removed} unreferenced upload(s)')
+
+    @app.cli.command('sync-sqlite-replica')
+    def sync_sqlite_replica():
+        """Copy the primary SQLite database over the replica, for local replica testing"""
+        engines = db.engines
+        if REPLICA_BIND not in engines:
+            raise click.ClickException('REPLICA_DATABASE_URL is not set')
+        primary, replica = engines[None].url, engines[REPLICA_BIND].url
+        if primary.get_backend_name() != 'sqlite' or replica.get_backend_name() != 'sqlite':
+            raise click.ClickException('Both databases must be SQLite files')
+        source = sqlite3.connect(primary.database)
+        target = sqlite3.connect(replica.database)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        click.echo(f'Copied {primary.database} to {replica.database}')
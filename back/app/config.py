@@ -10,23 +10,113 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your_default_secret_key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_default_jwt_secret')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
+    JWT_ALGORITHM = 'HS256'
+    # Accept the unsigned "test_token_{id}" tokens from older clients
+    LEGACY_TEST_TOKENS = True
     DEBUG = False
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every new SQLite connection, see app.utils.database
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # readers no longer block behind the writer
+        'synchronous': 'NORMAL',  # durable with WAL, fsyncs at checkpoints only
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),  # ms to wait for a lock
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024  # negative means KiB, i.e. 64MB
+    }
+    # Connection pool for server databases (PostgreSQL, MySQL)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_PRE_PING = True  # replace connections dropped by the server
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds
+    # Optional read replica; GET/HEAD requests read from it when set
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL') or None
+    # Seconds a user's reads stay on the primary after they commit a write
+    READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+    READ_YOUR_WRITES_MAX_USERS = 100000
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
+    # Resized copies of profile pictures (longest side in px), made in the background when Pillow is installed
+    PROFILE_PICTURE_SIZES = (64, 256, 1024)
+    PROFILE_PICTURE_FORMAT = os.getenv('PROFILE_PICTURE_FORMAT', 'WEBP')  # falls back to JPEG without WebP support
+    PROFILE_PICTURE_QUALITY = int(os.getenv('PROFILE_PICTURE_QUALITY', 80))
+    IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+    # Upload names are unique, so responses can be cached for a year
+    UPLOADS_MAX_AGE = int(os.getenv('UPLOADS_MAX_AGE', 365 * 24 * 3600))  # seconds
+    UPLOADS_FALLBACK_MAX_AGE = 60  # original served while a variant is being made
+    UPLOADS_SENDFILE = os.getenv('UPLOADS_SENDFILE') or None  # None, 'x-sendfile' or 'x-accel'
+    UPLOADS_ACCEL_PREFIX = os.getenv('UPLOADS_ACCEL_PREFIX', '/protected-uploads/')
+    AUTH_CACHE_MAX_SIZE = int(os.getenv('AUTH_CACHE_MAX_SIZE', 10000))
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', 60))  # seconds
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+    # Reverse proxies in front of the app (e.g. 1 for nginx) whose X-Forwarded-For
+    # and X-Forwarded-Proto are trusted, so request.remote_addr is the real client
+    # for per-IP login limits and logs. Leave at 0 when clients connect directly,
+    # or they could pick their own address by sending the header
+    TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+    # Login admission control: token buckets refilled at RATE attempts/second up to BURST
+    LOGIN_IP_RATE = float(os.getenv('LOGIN_IP_RATE', 1.0))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 20))
+    LOGIN_ACCOUNT_RATE = float(os.getenv('LOGIN_ACCOUNT_RATE', 0.1))
+    LOGIN_ACCOUNT_BURST = int(os.getenv('LOGIN_ACCOUNT_BURST', 5))
+    LOGIN_RATE_LIMIT_MAX_KEYS = 100000  # buckets kept per kind, least recently used evicted
+    # Concurrent login password checks; the rest of the hashing pool stays free for other work
+    LOGIN_MAX_VERIFICATIONS = int(os.getenv('LOGIN_MAX_VERIFICATIONS', 16))
+    CONTACT_IMPORT_BATCH_SIZE = int(os.getenv('CONTACT_IMPORT_BATCH_SIZE', 1000))
+    CONTACT_IMPORT_MAX_BATCH_SIZE = 10000
+    # Country code assumed for phone numbers entered without one
+    DEFAULT_PHONE_COUNTRY_CODE = os.getenv('DEFAULT_PHONE_COUNTRY_CODE', '1')
+    PHONE_MATCH_SUFFIX_DIGITS = 7
+    PHONE_LOOKUP_CACHE_MAX_USERS = int(os.getenv('PHONE_LOOKUP_CACHE_MAX_USERS', 10000))
+    PHONE_LOOKUP_CACHE_NUMBERS_PER_USER = 256
+    PHONE_LOOKUP_CACHE_TTL = int(os.getenv('PHONE_LOOKUP_CACHE_TTL', 60))  # seconds
+    CONTACT_EXPORT_BATCH_SIZE = int(os.getenv('CONTACT_EXPORT_BATCH_SIZE', 500))
+    CONTACT_BULK_MAX_IDS = 1000  # ids accepted by one bulk update/delete request
+    CONTACT_SYNC_PAGE_SIZE = 500  # changed contacts per delta sync page
+    CONTACT_SYNC_MAX_PAGE_SIZE = 5000
+    # Server-sent contact change feed; limits are per worker process
+    CONTACT_EVENTS_MAX_CONNECTIONS = int(os.getenv('CONTACT_EVENTS_MAX_CONNECTIONS', 100))
+    CONTACT_EVENTS_HEARTBEAT_SECONDS = 15
+    CONTACT_EVENTS_RETRY_MS = 3000  # client reconnect delay
+    CONTACT_EVENTS_REPLAY_SIZE = 100  # events kept per user for Last-Event-ID resume
+    CONTACT_EVENTS_REPLAY_MAX_USERS = 10000
+    CONTACT_EVENTS_QUEUE_SIZE = 100  # undelivered events per connection before it must resync
+    BATCH_MAX_REQUESTS = 20  # sub-requests per /api/batch call
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))  # threads for concurrent read batches
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    # Fraction of requests whose headers/body are dumped when LOG_LEVEL is DEBUG
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.01))
+    # Response compression; brotli is used only if the brotli package is installed
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_MIMETYPES = {
+        'application/json', 'application/x-ndjson', 'text/csv', 'text/vcard',
+        'text/html', 'text/plain', 'text/css', 'application/javascript'
+    }
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///contacts_dev.db')
 
 class TestingConfig(Config):
     TESTING = True
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 4))  # fast hashes for tests
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, synchronous='OFF')  # test data need not survive a crash
+    DB_POOL_SIZE = 2
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///contacts_test.db')
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///contacts_prod.db')
     DEBUG = False
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 20))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 40))
+    LEGACY_TEST_TOKENS = os.getenv('LEGACY_TEST_TOKENS', 'false').lower() == 'true'
 
 config_by_name = {
     'development': DevelopmentConfig,
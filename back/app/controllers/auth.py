@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify
 from marshmallow import ValidationError
 import json
-import traceback
+import logging
 from app import db
 from app.models.user import User, UserSchema
 from app.utils.auth import token_required, generate_token
+from app.utils.hashing import HashingQueueFull
+from app.utils.log import log_request_dump
+from app.utils.ratelimit import RateLimited, login_admission
 from app.utils.validators import save_image, validate_date
 
+logger = logging.getLogger(__name__)
+
 auth_bp = Blueprint('auth', __name__)
 user_schema = UserSchema()
 
@@ -15,14 +20,9 @@ def register():
     """
     User Registration endpoint
     """
-    print("=== REGISTER ENDPOINT CALLED ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     # Check if request is multipart (with profile picture) or regular JSON
     if request.content_type and 'multipart/form-data' in request.content_type:
         # Handle multipart form data
-        print("Processing multipart form data")
         try:
             data = {
                 'first_name': request.form.get('first_name'),
@@ -36,7 +36,7 @@ def register():
                 'address': request.form.get('address')
             }
             
-            print(f"Form data: {data}")
+            log_request_dump(logger, data)
             
             # Validate date of birth
             date_of_birth = validate_date(data['date_of_birth'])
@@ -83,7 +83,7 @@ def register():
             response_data = user_schema.dump(new_user)
             response_data['token'] = token
             
-            print("Registration successful")
+            logger.info("Registered user %s", new_user.id)
             return jsonify({
                 'message': 'User registered successfully',
                 'user': response_data,
@@ -91,22 +91,22 @@ def register():
             }), 201
             
         except ValidationError as err:
-            print(f"Validation error: {err.messages}")
+            logger.info("Registration rejected: %s", err.messages)
             return jsonify({'error': err.messages}), 400
+        except HashingQueueFull:
+            db.session.rollback()
+            return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
         except Exception as e:
-            print(f"Exception: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Registration failed")
             return jsonify({'error': str(e)}), 500
     else:
         # Handle JSON data
-        print("Processing JSON data")
         try:
             # Get the post data
             post_data = request.get_json()
-            print(f"JSON data: {post_data}")
+            log_request_dump(logger, post_data)
             
             if not post_data:
-                print("No input data provided")
                 return jsonify({'error': 'No input data provided'}), 400
                 
             # Validate date of birth
@@ -145,7 +145,7 @@ def register():
             # Prepare response
             response_data = user_schema.dump(new_user)
             
-            print("Registration successful")
+            logger.info("Registered user %s", new_user.id)
             return jsonify({
                 'message': 'User registered successfully',
                 'user': response_data,
@@ -153,11 +153,13 @@ def register():
             }), 201
             
         except ValidationError as err:
-            print(f"Validation error: {err.messages}")
+            logger.info("Registration rejected: %s", err.messages)
             return jsonify({'error': err.messages}), 400
+        except HashingQueueFull:
+            db.session.rollback()
+            return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
         except Exception as e:
-            print(f"Exception: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Registration failed")
             return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
@@ -165,53 +167,66 @@ def login():
     """
     User Login endpoint
     """
-    print("=== LOGIN ENDPOINT CALLED ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
+        # Turn away floods from one client before doing any work
+        login_admission.admit_ip(request.remote_addr)
+        
         # Get post data
         post_data = request.get_json()
-        print(f"Login data: {post_data}")
+        log_request_dump(logger, post_data)
         
         if not post_data:
-            print("No input data provided")
             return jsonify({'error': 'No input data provided'}), 400
             
         email = post_data.get('email')
         password = post_data.get('password')
         
         if not email or not password:
-            print("Email or password missing")
             return jsonify({'error': 'Email and password are required'}), 400
+        
+        # Per-account limit, applied before the lookup so unknown emails cost the same
+        login_admission.admit_account(str(email))
             
         # Find user by email
         user = User.query.filter_by(email=email).first()
         if not user:
-            print(f"User not found for email: {email}")
             return jsonify({'error': 'Invalid email or password'}), 401
             
         # Check password
-        if not user.check_password(password):
-            print("Invalid password")
+        with login_admission.verifying():
+            valid = user.check_password(password)
+        if not valid:
+            logger.info("Failed login for user %s", user.id)
             return jsonify({'error': 'Invalid email or password'}), 401
             
+        # Upgrade the stored hash if BCRYPT_LOG_ROUNDS has changed; a busy
+        # hashing pool just defers this to a later login
+        if user.needs_rehash():
+            try:
+                user.password = password
+                db.session.commit()
+            except HashingQueueFull:
+                db.session.rollback()
+            
         # Generate auth token
         token = generate_token(user.id)
         
         # Prepare response
         response_data = user_schema.dump(user)
         
-        print("Login successful")
+        logger.info("User %s logged in", user.id)
         return jsonify({
             'message': 'Successfully logged in',
             'user': response_data,
             'token': token
         }), 200
             
+    except RateLimited as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except HashingQueueFull:
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
-        print(f"Login exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Login failed")
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/test-token', methods=['GET'])
@@ -220,11 +235,12 @@ def test_token(current_user):
     """
     Test token validity endpoint
     """
-    print("=== TEST TOKEN ENDPOINT CALLED ===")
-    print(f"Headers: {dict(request.headers)}")
-    print(f"User: {current_user.email}")
+    log_request_dump(logger)
+    
+    # current_user is a cached Principal; load the full profile for the response
+    user = User.query.get(current_user.id)
     
     return jsonify({
         'message': 'Token is valid',
-        'user': user_schema.dump(current_user)
+        'user': user_schema.dump(user)
     }), 200
\ No newline at end of file
@@ -0,0 +1,176 @@
+from flask import Blueprint, Response, request, jsonify, current_app, g
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.test import EnvironBuilder
+from app import db
+from app.utils.auth import principal_from_token
+from app.utils.log import log_request_dump
+from app.views.serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+# Create the blueprint
+batch_bp = Blueprint('batch', __name__)
+
+# Methods a sub-request may use, and the ones safe to run concurrently
+BATCH_METHODS = {'GET', 'POST', 'PUT', 'DELETE'}
+READ_METHODS = {'GET'}
+
+# Streaming endpoints, which a batch would have to buffer (or, for the event
+# feed, would never finish reading)
+STREAMING_PATHS = {
+    '/api/simple_contacts/events',
+    '/api/simple_contacts/export',
+    '/api/simple_contacts/import'
+}
+
+# Sub-response headers passed back to the client
+BATCH_RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Cache-Control', 'Retry-After', 'X-DB-Engine')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared pool for concurrent read batches, sized by BATCH_MAX_WORKERS"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config['BATCH_MAX_WORKERS'],
+                thread_name_prefix='batch'
+            )
+        return _executor
+
+
+def parse_sub_request(index, spec):
+    """Validate one entry of `requests`; returns (method, path, body) or raises ValueError"""
+    if not isinstance(spec, dict):
+        raise ValueError(f'requests[{index}] must be an object')
+    method = str(spec.get('method', 'GET')).upper()
+    path = spec.get('path')
+    if method not in BATCH_METHODS:
+        raise ValueError(f'requests[{index}].method must be one of: {", ".join(sorted(BATCH_METHODS))}')
+    if not isinstance(path, str) or not path.startswith('/api/') or path.startswith('/api/batch'):
+        raise ValueError(f'requests[{index}].path must be an /api/ path other than /api/batch')
+    if path.split('?', 1)[0].rstrip('/') in STREAMING_PATHS:
+        raise ValueError(f'requests[{index}].path is a streaming endpoint and cannot be batched')
+    return method, path, spec.get('body')
+
+
+def build_environ(method, path, body, headers):
+    """WSGI environ for a sub-request, carrying the batch's Authorization header"""
+    return EnvironBuilder(
+        path=path,
+        method=method,
+        base_url=request.host_url,
+        headers=headers,
+        json=body if method != 'GET' and body is not None else None,
+        environ_base={'REMOTE_ADDR': request.remote_addr}
+    ).get_environ()
+
+
+def dispatch(app, environ, authenticated):
+    """
+    Run one sub-request through the app's full request handling (hooks,
+    routing, error handlers) and return its Response. Reuses the current
+    application context, and so the db session, when there is one
+    """
+    with app.request_context(environ):
+        g.authenticated = authenticated
+        try:
+            response = app.full_dispatch_request()
+            if response.is_streamed:
+                # Never buffer a stream; close it so it releases what it holds
+                response.close()
+                response = jsonify({'error': 'Streaming responses cannot be batched'})
+                response.status_code = 400
+            # Read bodies while the request context is still active,
+            # so a failure partway through only fails this sub-request
+            response.get_data()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Batch sub-request failed")
+            response = jsonify({'error': str(e)})
+            response.status_code = 500
+        return response
+
+
+def dispatch_isolated(app, environ, authenticated):
+    """dispatch() with the caller's g saved and restored around the sub-request"""
+    saved = dict(vars(g))
+    vars(g).clear()
+    try:
+        return dispatch(app, environ, authenticated)
+    finally:
+        vars(g).clear()
+        vars(g).update(saved)
+
+
+def encode_results(responses):
+    """
+    JSON for the batch response. JSON sub-response bodies are spliced in as
+    they are, rather than parsed and encoded again
+    """
+    parts = []
+    for response in responses:
+        head = dumps({
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in BATCH_RESPONSE_HEADERS if name in response.headers}
+        })
+        data = response.get_data()
+        if not data:
+            body = b'null'
+        elif response.is_json:
+            body = data
+        else:
+            body = dumps(data.decode('utf-8', 'replace'))
+        parts.append(head[:-1] + b',"body":' + body + b'}')
+    return b'{"responses":[' + b','.join(parts) + b']}'
+
+
+@batch_bp.route('/', methods=['POST'])
+def batch():
+    """
+    Run up to BATCH_MAX_REQUESTS sub-requests ({method, path, body}) against
+    the API with one authentication, in order and on the same db session.
+    With `concurrent` set and only GET sub-requests they run in parallel.
+    Returns {"responses": [{status, headers, body}, ...]} in request order
+    """
+    post_data = request.get_json(silent=True)
+    log_request_dump(logger, post_data)
+    if not isinstance(post_data, dict) or not isinstance(post_data.get('requests'), list):
+        return jsonify({'error': 'requests must be a list'}), 400
+
+    specs = post_data['requests']
+    max_requests = current_app.config['BATCH_MAX_REQUESTS']
+    if not specs or len(specs) > max_requests:
+        return jsonify({'error': f'Send between 1 and {max_requests} requests'}), 400
+    try:
+        sub_requests = [parse_sub_request(index, spec) for index, spec in enumerate(specs)]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Authenticate once; sub-requests reuse the result
+    headers = {}
+    authenticated = None
+    auth_header = request.headers.get('Authorization')
+    if auth_header:
+        headers['Authorization'] = auth_header
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        principal, error = principal_from_token(token)
+        if not principal:
+            return jsonify({'error': error}), 401
+        authenticated = (token, principal)
+
+    app = current_app._get_current_object()
+    environs = [build_environ(method, path, body, headers) for method, path, body in sub_requests]
+
+    if post_data.get('concurrent') and all(method in READ_METHODS for method, _, _ in sub_requests):
+        # Each worker thread gets its own application context and session
+        responses = list(get_executor().map(lambda environ: dispatch(app, environ, authenticated), environs))
+    else:
+        responses = [dispatch_isolated(app, environ, authenticated) for environ in environs]
+
+    return Response(encode_results(responses), mimetype='application/json')
@@ -1,15 +1,22 @@
 from flask import Blueprint, request, jsonify
 from marshmallow import ValidationError
-from sqlalchemy import or_
 import json
-import traceback
+import logging
 from app import db
-from app.models.contact import Contact, ContactSchema
+from app.models.contact import Contact, ContactPhone, ContactSchema, ContactTombstone
+from app.models.user import User
 from app.utils.auth import token_required
+from app.utils.cache import invalidate_user_contacts
+from app.utils.events import publish_change
+from app.utils.log import log_request_dump
+from app.utils.search import search_contacts
+from app.views.serializers import json_response, serialize_contact
+
+logger = logging.getLogger(__name__)
 
 contacts_bp = Blueprint('contacts', __name__)
+# Validates input only; responses use app.views.serializers
 contact_schema = ContactSchema()
-contacts_schema = ContactSchema(many=True)
 
 @contacts_bp.route('/', methods=['POST'])
 @token_required
@@ -17,18 +24,12 @@ def create_contact(current_user):
     """
     Create a new contact
     """
-    print("=== CREATE CONTACT ENDPOINT CALLED ===")
-    print(f"User: {current_user.email}")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
         # Get post data
         post_data = request.get_json()
-        print(f"Contact data: {post_data}")
+        log_request_dump(logger, post_data)
         
         if not post_data:
-            print("No input data provided")
             return jsonify({'error': 'No input data provided'}), 400
             
         # Validate and deserialize input
@@ -47,19 +48,20 @@ def create_contact(current_user):
         new_contact.set_phone_numbers(contact_data.get('phone_numbers', []))
         
         # Save contact to database
+        new_contact.sync_version = User.adjust_contact_count(current_user.id, 1)
         db.session.add(new_contact)
         db.session.commit()
+        invalidate_user_contacts(current_user.id)
+        publish_change(current_user.id, new_contact.sync_version, 'created', [new_contact.id], new_contact)
         
-        print("Contact created successfully")
         # Return created contact
-        return jsonify(contact_schema.dump(new_contact)), 201
+        return json_response(serialize_contact(new_contact, detail=True), 201)
         
     except ValidationError as err:
-        print(f"Validation error: {err.messages}")
+        logger.info("Contact rejected: %s", err.messages)
         return jsonify({'error': err.messages}), 400
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error creating contact")
         return jsonify({'error': str(e)}), 500
 
 @contacts_bp.route('/', methods=['GET'])
@@ -68,19 +70,12 @@ def get_contacts(current_user):
     """
     Get all contacts with pagination and search
     """
-    print("=== GET CONTACTS ENDPOINT CALLED ===")
-    print(f"User: {current_user.email}")
-    print(f"Headers: {dict(request.headers)}")
-    print(f"Query params: {dict(request.args)}")
-    
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         search = request.args.get('search', '')
         
-        print(f"Page: {page}, Per page: {per_page}, Search: '{search}'")
-        
         # Cap per_page to avoid excessive loads
         if per_page > 50:
             per_page = 50
@@ -88,20 +83,18 @@ def get_contacts(current_user):
         # Create base query
         query = Contact.query.filter_by(user_id=current_user.id)
         
-        # Apply search if provided
+        # Apply search if provided, best matches first when using the full-text index
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Contact.first_name.ilike(search_term),
-                    Contact.last_name.ilike(search_term),
-                    Contact.company.ilike(search_term),
-                    Contact.address.ilike(search_term)
-                )
-            )
+            query, rank = search_contacts(query, search)
+            
+        if rank is not None:
+            query = query.order_by(rank, Contact.id)
+        else:
+            query = query.order_by(Contact.first_name, Contact.last_name)
             
         # Apply pagination
-        pagination = query.order_by(Contact.first_name, Contact.last_name).paginate(
+        pagination = query.paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -110,22 +103,23 @@ def get_contacts(current_user):
         total = pagination.total
         pages = pagination.pages
         
-        print(f"Found {total} contacts over {pages} pages")
+        # Transform contacts list, loading the page's phone numbers with one query
+        phone_numbers = ContactPhone.numbers_for(contacts)
+        result = [
+            serialize_contact(contact, phone_numbers.get(contact.id, []), detail=True)
+            for contact in contacts
+        ]
         
-        # Transform contacts list
-        result = contacts_schema.dump(contacts)
-        
-        return jsonify({
+        return json_response({
             'contacts': result,
             'total': total,
             'pages': pages,
             'page': page,
             'per_page': per_page
-        }), 200
+        })
             
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error getting contacts")
         return jsonify({'error': str(e)}), 500
 
 @contacts_bp.route('/<int:contact_id>', methods=['GET'])
@@ -134,23 +128,17 @@ def get_contact(current_user, contact_id):
     """
     Get a specific contact by ID
     """
-    print(f"=== GET CONTACT {contact_id} ENDPOINT CALLED ===")
-    print(f"User: {current_user.email}")
-    
     try:
         # Find contact
         contact = Contact.query.filter_by(id=contact_id, user_id=current_user.id).first()
         if not contact:
-            print(f"Contact {contact_id} not found")
             return jsonify({'error': 'Contact not found'}), 404
             
-        print(f"Contact found: {contact.first_name} {contact.last_name}")
         # Return contact details
-        return jsonify(contact_schema.dump(contact)), 200
+        return json_response(serialize_contact(contact, detail=True))
         
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error getting contact")
         return jsonify({'error': str(e)}), 500
 
 @contacts_bp.route('/<int:contact_id>', methods=['PUT'])
@@ -159,24 +147,17 @@ def update_contact(current_user, contact_id):
     """
     Update an existing contact
     """
-    print(f"=== UPDATE CONTACT {contact_id} ENDPOINT CALLED ===")
-    print(f"User: {current_user.email}")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
         # Find contact
         contact = Contact.query.filter_by(id=contact_id, user_id=current_user.id).first()
         if not contact:
-            print(f"Contact {contact_id} not found")
             return jsonify({'error': 'Contact not found'}), 404
             
         # Get post data
         post_data = request.get_json()
-        print(f"Update data: {post_data}")
+        log_request_dump(logger, post_data)
         
         if not post_data:
-            print("No input data provided")
             return jsonify({'error': 'No input data provided'}), 400
             
         # Validate and deserialize input
@@ -193,18 +174,19 @@ def update_contact(current_user, contact_id):
             contact.set_phone_numbers(contact_data['phone_numbers'])
         
         # Save changes
+        contact.sync_version = User.bump_contacts_version(current_user.id)
         db.session.commit()
+        invalidate_user_contacts(current_user.id)
+        publish_change(current_user.id, contact.sync_version, 'updated', [contact.id], contact)
         
-        print(f"Contact {contact_id} updated successfully")
         # Return updated contact
-        return jsonify(contact_schema.dump(contact)), 200
+        return json_response(serialize_contact(contact, detail=True))
         
     except ValidationError as err:
-        print(f"Validation error: {err.messages}")
+        logger.info("Contact rejected: %s", err.messages)
         return jsonify({'error': err.messages}), 400
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error updating contact")
         return jsonify({'error': str(e)}), 500
 
 @contacts_bp.route('/<int:contact_id>', methods=['DELETE'])
@@ -213,26 +195,24 @@ def delete_contact(current_user, contact_id):
     """
     Delete a contact
     """
-    print(f"=== DELETE CONTACT {contact_id} ENDPOINT CALLED ===")
-    print(f"User: {current_user.email}")
-    
     try:
         # Find contact
         contact = Contact.query.filter_by(id=contact_id, user_id=current_user.id).first()
         if not contact:
-            print(f"Contact {contact_id} not found")
             return jsonify({'error': 'Contact not found'}), 404
             
         # Delete contact
         db.session.delete(contact)
+        version = User.adjust_contact_count(current_user.id, -1)
+        ContactTombstone.record(current_user.id, [contact.id], version)
         db.session.commit()
+        invalidate_user_contacts(current_user.id)
+        publish_change(current_user.id, version, 'deleted', [contact_id])
         
-        print(f"Contact {contact_id} deleted successfully")
         return jsonify({
             'message': 'Contact deleted successfully'
         }), 200
         
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error deleting contact")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
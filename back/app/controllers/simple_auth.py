@@ -1,9 +1,17 @@
 from flask import Blueprint, request, jsonify
 import json
+import logging
 from datetime import datetime
 from app import db, bcrypt
 from app.models.user import User
+from app.utils.auth import generate_user_token, principal_from_token
+from app.utils.hashing import HashingQueueFull
+from app.utils.log import log_request_dump
+from app.utils.ratelimit import RateLimited, login_admission
 from app.utils.validators import save_image
+from app.views.serializers import serialize_principal, serialize_user
+
+logger = logging.getLogger(__name__)
 
 # Create the blueprint
 simple_auth_bp = Blueprint('simple_auth', __name__)
@@ -13,16 +21,10 @@ def register():
     """
     Simplified user registration endpoint with profile picture support
     """
-    print("=== SIMPLE REGISTER ENDPOINT CALLED ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
         # Check if request is multipart (with profile picture) or regular JSON
         if request.content_type and 'multipart/form-data' in request.content_type:
             # Handle multipart form data (with profile picture)
-            print("Processing multipart form data (with profile picture)")
-            
             # Extract form data
             data = {
                 'first_name': request.form.get('first_name'),
@@ -36,7 +38,7 @@ def register():
                 'address': request.form.get('address')
             }
             
-            print(f"Form data received: {data}")
+            log_request_dump(logger, data)
             
             # Manual validation for multipart form data
             required_fields = ['first_name', 'last_name', 'email', 'password', 
@@ -62,8 +64,7 @@ def register():
                     date_of_birth = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date()
                 else:
                     return jsonify({'error': 'Date of birth is required'}), 400
-            except ValueError as e:
-                print(f"Date parsing error: {e}")
+            except ValueError:
                 return jsonify({'error': 'Invalid date format. Please use a valid date.'}), 400
             
             # Validate phone numbers
@@ -94,43 +95,30 @@ def register():
             if 'profile_picture' in request.files:
                 profile_pic = request.files['profile_picture']
                 if profile_pic and profile_pic.filename:
-                    print(f"Processing profile picture: {profile_pic.filename}")
                     filename = save_image(profile_pic)
                     if filename:
                         new_user.profile_picture = filename
-                        print(f"Profile picture saved as: {filename}")
                     else:
-                        print("Profile picture save failed")
+                        logger.warning("Profile picture %r was not saved", profile_pic.filename)
             
             # Save user to database
             db.session.add(new_user)
             db.session.commit()
             
-            # Generate a simple token
-            token = f"test_token_{new_user.id}"
+            # Generate a signed token carrying the user's claims
+            token = generate_user_token(new_user)
             
-            print("Registration successful with profile picture support")
+            logger.info("Registered user %s", new_user.id)
             return jsonify({
                 'message': 'User registered successfully',
-                'user': {
-                    'id': new_user.id,
-                    'first_name': new_user.first_name,
-                    'last_name': new_user.last_name,
-                    'email': new_user.email,
-                    'profile_picture': new_user.profile_picture,
-                    'date_of_birth': new_user.date_of_birth.isoformat() if new_user.date_of_birth else None,
-                    'gender': new_user.gender,
-                    'address': new_user.address,
-                    'phone_numbers': new_user.get_phone_numbers()
-                },
+                'user': serialize_user(new_user),
                 'token': token
             }), 201
             
         else:
             # Handle JSON data (without profile picture)
-            print("Processing JSON data")
             post_data = request.get_json()
-            print(f"JSON data: {post_data}")
+            log_request_dump(logger, post_data)
             
             if not post_data:
                 return jsonify({'error': 'No input data provided'}), 400
@@ -179,33 +167,23 @@ def register():
             db.session.add(new_user)
             db.session.commit()
             
-            # Generate a simple token
-            token = f"test_token_{new_user.id}"
+            # Generate a signed token carrying the user's claims
+            token = generate_user_token(new_user)
             
-            print("Registration successful (JSON)")
+            logger.info("Registered user %s", new_user.id)
             return jsonify({
                 'message': 'User registered successfully',
-                'user': {
-                    'id': new_user.id,
-                    'first_name': new_user.first_name,
-                    'last_name': new_user.last_name,
-                    'email': new_user.email,
-                    'profile_picture': new_user.profile_picture,
-                    'date_of_birth': new_user.date_of_birth.isoformat() if new_user.date_of_birth else None,
-                    'gender': new_user.gender,
-                    'address': new_user.address,
-                    'phone_numbers': new_user.get_phone_numbers()
-                },
+                'user': serialize_user(new_user),
                 'token': token
             }), 201
             
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error in phone numbers: {e}")
+    except json.JSONDecodeError:
         return jsonify({'error': 'Invalid phone numbers format'}), 400
+    except HashingQueueFull:
+        db.session.rollback()
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Registration failed")
         return jsonify({'error': str(e)}), 500
 
 @simple_auth_bp.route('/login', methods=['POST'])
@@ -213,14 +191,13 @@ def login():
     """
     Simplified user login endpoint - NOW INCLUDES PROFILE PICTURE
     """
-    print("=== SIMPLE LOGIN ENDPOINT CALLED ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
+        # Turn away floods from one client before doing any work
+        login_admission.admit_ip(request.remote_addr)
+        
         # Get post data
         post_data = request.get_json()
-        print(f"Login data: {post_data}")
+        log_request_dump(logger, post_data)
         
         if not post_data:
             return jsonify({'error': 'No input data provided'}), 400
@@ -230,6 +207,9 @@ def login():
         
         if not email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
+        
+        # Per-account limit, applied before the lookup so unknown emails cost the same
+        login_admission.admit_account(str(email))
             
         # Find user by email
         user = User.query.filter_by(email=email).first()
@@ -237,29 +217,27 @@ def login():
             return jsonify({'error': 'Invalid email or password'}), 401
             
         # Check password
-        if not user.check_password(password):
+        with login_admission.verifying():
+            valid = user.check_password(password)
+        if not valid:
             return jsonify({'error': 'Invalid email or password'}), 401
             
-        # Generate simple token for testing
-        token = f"test_token_{user.id}"
+        # Upgrade the stored hash if BCRYPT_LOG_ROUNDS has changed; a busy
+        # hashing pool just defers this to a later login
+        if user.needs_rehash():
+            try:
+                user.password = password
+                db.session.commit()
+            except HashingQueueFull:
+                db.session.rollback()
+            
+        # Generate a signed token carrying the user's claims
+        token = generate_user_token(user)
         
         # Prepare COMPLETE response including profile picture
-        user_data = {
-            'id': user.id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email,
-            'profile_picture': user.profile_picture,  # ← THIS WAS MISSING!
-            'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
-            'gender': user.gender,
-            'address': user.address,
-            'phone_numbers': user.get_phone_numbers()
-        }
+        user_data = serialize_user(user)
         
-        print(f"Login successful for user: {user.email}")
-        print(f"User has profile picture: {user.profile_picture is not None}")
-        if user.profile_picture:
-            print(f"Profile picture filename: {user.profile_picture}")
+        logger.info("User %s logged in", user.id)
         
         return jsonify({
             'message': 'Successfully logged in',
@@ -267,10 +245,12 @@ def login():
             'token': token
         }), 200
             
+    except RateLimited as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except HashingQueueFull:
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
-        print(f"Login exception: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Login failed")
         return jsonify({'error': str(e)}), 500
 
 @simple_auth_bp.route('/test-token', methods=['GET'])
@@ -278,8 +258,6 @@ def test_token():
     """
     Simple token test endpoint
     """
-    print("=== SIMPLE TEST TOKEN ENDPOINT CALLED ===")
-    
     auth_header = request.headers.get('Authorization')
     
     if not auth_header:
@@ -290,25 +268,11 @@ def test_token():
     else:
         token = auth_header
         
-    # For our simplified API, token is in format "test_token_{user_id}"
-    if token.startswith('test_token_'):
-        try:
-            user_id = int(token.split('_')[2])
-            user = User.query.get(user_id)
-            if not user:
-                return jsonify({'error': 'User not found'}), 401
-            
-            return jsonify({
-                'message': 'Token is valid',
-                'user': {
-                    'id': user.id,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'email': user.email,
-                    'profile_picture': user.profile_picture  # Include profile picture in token test too
-                }
-            }), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 401
+    user, error = principal_from_token(token)
+    if not user:
+        return jsonify({'error': error}), 401
     
-    return jsonify({'error': 'Invalid token format'}), 401
\ No newline at end of file
+    return jsonify({
+        'message': 'Token is valid',
+        'user': serialize_principal(user)
+    }), 200
\ No newline at end of file
@@ -1,15 +1,40 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+import io
 import json
+import logging
+import queue
+from werkzeug.exceptions import RequestEntityTooLarge
 from app import db
-from app.models.contact import Contact
+from app.models.contact import Contact, ContactPhone, ContactTombstone
 from app.models.user import User
+from app.utils.auth import principal_from_token
+from app.utils.cache import invalidate_user_contacts, phone_lookup_cache
+from app.utils.etag import cache_headers, make_etag, not_modified
+from app.utils.events import contact_events, publish_change, sse_frame
+from app.utils.exporters import EXPORT_FORMATS, chunked
+from app.utils.importers import iter_csv_contacts, iter_ndjson_contacts
+from app.utils.log import log_request_dump
+from app.utils.pagination import encode_cursor, decode_cursor, encode_sync_cursor, decode_sync_cursor
+from app.utils.phones import normalize_phone
+from app.utils.search import search_contacts
+from app.utils.validators import validate_contact_data
+from app.views.serializers import json_response, serialize_contact
+
+logger = logging.getLogger(__name__)
 
 # Create the blueprint
 simple_contacts_bp = Blueprint('simple_contacts', __name__)
 
+# Accepted bulk import formats
+CSV_MIMETYPES = {'text/csv'}
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+# Per-row errors reported by an import before the list is truncated
+MAX_IMPORT_ERRORS = 1000
+
 # Helper function to get user from token
 def get_user_from_token(request):
-    """Simple function to get user from token for testing"""
+    """Authenticate the request's bearer token without touching the database"""
     auth_header = request.headers.get('Authorization')
     
     if not auth_header:
@@ -20,24 +45,11 @@ def get_user_from_token(request):
     else:
         token = auth_header
         
-    # For our simplified API, token is in format "test_token_{user_id}"
-    if token.startswith('test_token_'):
-        try:
-            user_id = int(token.split('_')[2])
-            user = User.query.get(user_id)
-            if not user:
-                return None, 'User not found'
-            return user, None
-        except Exception as e:
-            return None, str(e)
-    
-    return None, 'Invalid token format'
+    return principal_from_token(token)
 
 @simple_contacts_bp.route('/', methods=['POST'])
 def create_contact():
     """Create a new contact"""
-    print("=== SIMPLE CREATE CONTACT ENDPOINT CALLED ===")
-    
     # Authenticate user
     user, error = get_user_from_token(request)
     if not user:
@@ -46,14 +58,14 @@ def create_contact():
     try:
         # Get post data
         post_data = request.get_json()
+        log_request_dump(logger, post_data)
         if not post_data:
             return jsonify({'error': 'No input data provided'}), 400
             
         # Validate required fields
-        required_fields = ['first_name', 'last_name']
-        for field in required_fields:
-            if field not in post_data or not post_data[field]:
-                return jsonify({'error': f'Field {field} is required'}), 400
+        error = validate_contact_data(post_data)
+        if error:
+            return jsonify({'error': error}), 400
                 
         # Create new contact
         new_contact = Contact(
@@ -68,130 +80,492 @@ def create_contact():
         phone_numbers = post_data.get('phone_numbers', [])
         new_contact.set_phone_numbers(phone_numbers)
         
-        # Save to database
+        # Save to database, counting the contact in the same transaction.
+        # The count goes first so the contact is written by one INSERT
+        new_contact.sync_version = User.adjust_contact_count(user.id, 1)
         db.session.add(new_contact)
         db.session.commit()
+        invalidate_user_contacts(user.id)
+        publish_change(user.id, new_contact.sync_version, 'created', [new_contact.id], new_contact)
         
         # Return response
-        return jsonify({
-            'id': new_contact.id,
-            'first_name': new_contact.first_name,
-            'last_name': new_contact.last_name,
-            'company': new_contact.company,
-            'address': new_contact.address,
-            'phone_numbers': new_contact.get_phone_numbers(),
-            'created_at': new_contact.created_at.isoformat()
-        }), 201
+        return json_response(serialize_contact(new_contact), 201)
             
     except Exception as e:
-        print(f"Error creating contact: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error creating contact")
         return jsonify({'error': str(e)}), 500
 
+@simple_contacts_bp.route('/import', methods=['POST'])
+def import_contacts():
+    """
+    Bulk import contacts from a streamed CSV (text/csv) or NDJSON
+    (application/x-ndjson) body. Rows are validated like create_contact and
+    inserted in batches of `batch_size`, one transaction per batch
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    # Declared oversize bodies are refused before anything is read;
+    # chunked ones raise RequestEntityTooLarge once they pass the limit
+    limit = current_app.config['MAX_CONTENT_LENGTH']
+    if limit is not None and (request.content_length or 0) > limit:
+        return too_large_response(limit, 0)
+    
+    # Read the body as text line by line so memory stays flat
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    if request.mimetype in CSV_MIMETYPES:
+        rows = iter_csv_contacts(stream)
+    elif request.mimetype in NDJSON_MIMETYPES:
+        rows = iter_ndjson_contacts(stream)
+    else:
+        return jsonify({'error': 'Content-Type must be text/csv or application/x-ndjson'}), 415
+    
+    batch_size = request.args.get('batch_size', current_app.config['CONTACT_IMPORT_BATCH_SIZE'], type=int)
+    batch_size = max(1, min(batch_size, current_app.config['CONTACT_IMPORT_MAX_BATCH_SIZE']))
+    
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    try:
+        for row_number, data, error in rows:
+            if error is None:
+                error = validate_contact_data(data)
+            if error:
+                failed += 1
+                # Keep the report bounded for very bad uploads
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'row': row_number, 'error': error})
+                continue
+            
+            phone_numbers = data.get('phone_numbers', [])
+            batch.append(({
+                'user_id': user.id,
+                'first_name': data['first_name'],
+                'last_name': data['last_name'],
+                'company': data.get('company'),
+                'address': data.get('address'),
+                'phone_numbers': json.dumps(phone_numbers)
+            }, phone_numbers))
+            if len(batch) >= batch_size:
+                insert_contact_batch(user.id, batch)
+                imported += len(batch)
+                batch = []
+        
+        if batch:
+            insert_contact_batch(user.id, batch)
+            imported += len(batch)
+        
+        logger.info("Imported %s contacts for user %s (%s rejected)", imported, user.id, failed)
+        return jsonify({
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors)
+        }), 200
+    
+    except RequestEntityTooLarge:
+        db.session.rollback()
+        logger.warning("Import for user %s exceeded %s bytes after %s contacts", user.id, limit, imported)
+        return too_large_response(limit, imported)
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error importing contacts")
+        # Earlier batches are already committed, so report how far we got
+        return jsonify({'error': str(e), 'imported': imported}), 500
+
+def too_large_response(limit, imported):
+    """
+    413 for an import body over MAX_CONTENT_LENGTH; earlier batches stay committed
+    """
+    return jsonify({
+        'error': f'Upload exceeds the {limit} byte limit',
+        'imported': imported
+    }), 413
+
+def insert_contact_batch(user_id, batch):
+    """
+    Insert a list of (contact column dict, phone numbers) pairs with one
+    statement per table and commit
+    """
+    version = User.adjust_contact_count(user_id, len(batch))
+    contact_ids = db.session.scalars(
+        db.insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+        [dict(row, sync_version=version) for row, _ in batch]
+    ).all()
+    phone_rows = []
+    for contact_id, (_, phone_numbers) in zip(contact_ids, batch):
+        phone_rows.extend(ContactPhone.rows_for(contact_id, user_id, phone_numbers))
+    if phone_rows:
+        db.session.execute(db.insert(ContactPhone), phone_rows)
+    db.session.commit()
+    invalidate_user_contacts(user_id)
+    publish_change(user_id, version, 'created', contact_ids)
+
+@simple_contacts_bp.route('/export', methods=['GET'])
+def export_contacts():
+    """
+    Stream all of the user's contacts as NDJSON, CSV or vCard (`format`).
+    Rows are read from the database in batches while the response is sent,
+    so memory and time-to-first-byte do not grow with the contact count
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    lines, mimetype, extension = EXPORT_FORMATS[export_format]
+    
+    statement = db.select(
+        Contact.id, Contact.first_name, Contact.last_name,
+        Contact.company, Contact.address, Contact.phone_numbers
+    ).where(
+        Contact.user_id == user.id
+    ).order_by(
+        Contact.first_name, Contact.last_name, Contact.id
+    ).execution_options(yield_per=current_app.config['CONTACT_EXPORT_BATCH_SIZE'])
+    
+    def generate():
+        rows = db.session.execute(statement)
+        try:
+            yield from chunked(lines(rows))
+        finally:
+            rows.close()
+    
+    # No Content-Length, so the server sends the body with chunked encoding
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=contacts.{extension}'}
+    )
+
+@simple_contacts_bp.route('/lookup', methods=['GET'])
+def lookup_phone_number():
+    """
+    Resolve an incoming phone number (`number`) to the user's contacts,
+    e.g. for caller ID. Recently looked-up numbers are answered from memory
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    normalized = normalize_phone(request.args.get('number'), current_app.config['DEFAULT_PHONE_COUNTRY_CODE'])
+    if not normalized:
+        return jsonify({'error': 'A valid phone number is required'}), 400
+    
+    try:
+        cached_numbers = phone_lookup_cache.get(user.id)
+        matches = cached_numbers.get(normalized) if cached_numbers is not None else None
+        if matches is None:
+            matches = ContactPhone.lookup(user.id, normalized)
+            if cached_numbers is None:
+                cached_numbers = {}
+                phone_lookup_cache.set(user.id, cached_numbers)
+            if len(cached_numbers) < current_app.config['PHONE_LOOKUP_CACHE_NUMBERS_PER_USER']:
+                cached_numbers[normalized] = matches
+        
+        return json_response({
+            'number': normalized,
+            'matches': matches
+        })
+    
+    except Exception as e:
+        logger.exception("Error looking up phone number")
+        return jsonify({'error': str(e)}), 500
+
+@simple_contacts_bp.route('/sync', methods=['GET'])
+def sync_contacts():
+    """
+    Delta sync: contacts created or changed, and ids deleted, since the
+    `since` version a client stored from its last sync (0 for everything).
+    Versions come from users.contacts_version, which every write bumps in
+    its transaction, so unlike timestamps they cannot be skewed or reordered.
+    Large change sets are paged with `cursor`; deletions come with the last page
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', current_app.config['CONTACT_SYNC_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['CONTACT_SYNC_MAX_PAGE_SIZE']))
+    cursor = request.args.get('cursor')
+    
+    try:
+        # Read the version first: anything committed later is > version and
+        # is sent again next time rather than missed
+        version = User.contacts_version_of(user.id) or 0
+        
+        query = Contact.query.filter(Contact.user_id == user.id, Contact.sync_version > since)
+        if cursor:
+            position = decode_sync_cursor(cursor)
+            if not position:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(db.tuple_(Contact.sync_version, Contact.id) > position)
+        contacts = query.order_by(Contact.sync_version, Contact.id).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(contacts) > limit:
+            contacts = contacts[:limit]
+            next_cursor = encode_sync_cursor(contacts[-1].sync_version, contacts[-1].id)
+        
+        deleted = []
+        if next_cursor is None:
+            deleted = db.session.scalars(
+                db.select(ContactTombstone.contact_id)
+                .where(ContactTombstone.user_id == user.id, ContactTombstone.sync_version > since)
+                .order_by(ContactTombstone.sync_version)
+            ).all()
+        
+        phone_numbers = ContactPhone.numbers_for(contacts)
+        return json_response({
+            'contacts': [
+                serialize_contact(contact, phone_numbers.get(contact.id, []), detail=True)
+                for contact in contacts
+            ],
+            'deleted': deleted,
+            'next_cursor': next_cursor,
+            'version': version
+        })
+    
+    except Exception as e:
+        logger.exception("Error syncing contacts")
+        return jsonify({'error': str(e)}), 500
+
+def event_stream(subscription, backlog, resync_since, heartbeat, retry_ms):
+    """
+    Frames of a change feed: the replayed backlog, then live events from the
+    subscription, with a comment line every `heartbeat` seconds of silence.
+    A `resync` event asks the client to fetch /sync?since=<since> because
+    some changes cannot be replayed
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n".encode('ascii')
+        if resync_since is not None:
+            yield sse_frame('resync', {'since': resync_since})
+        replayed = {event.id for event in backlog}
+        last_sent = resync_since
+        for event in backlog:
+            yield event.frame
+            last_sent = event.id
+        while True:
+            if subscription.overflowed:
+                # The client fell too far behind; drop the queue and have it catch up from the database
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield sse_frame('resync', {'since': last_sent or 0})
+            try:
+                event = subscription.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield b": heartbeat\n\n"
+                continue
+            if event.id in replayed:
+                continue
+            yield event.frame
+            last_sent = event.id
+    finally:
+        contact_events.unsubscribe(subscription)
+
+@simple_contacts_bp.route('/events', methods=['GET'])
+def contact_event_feed():
+    """
+    Server-sent events for the user's contact changes: `created`, `updated`
+    and `deleted` events carrying the changed ids (and the contact itself for
+    single-contact writes). Event ids are contacts versions, so a client
+    reconnecting with Last-Event-ID gets what it missed from the replay log,
+    or a `resync` event pointing it at /sync. EventSource cannot set headers,
+    so the token may also be passed as `token`
+    """
+    # Authenticate user
+    if 'Authorization' not in request.headers and request.args.get('token'):
+        user, error = principal_from_token(request.args['token'])
+    else:
+        user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+
+    # Subscribe before replaying so nothing committed in between is missed
+    subscription = contact_events.subscribe(user.id)
+    if subscription is None:
+        response = jsonify({'error': 'Too many event streams, try again later'})
+        response.headers['Retry-After'] = str(current_app.config['CONTACT_EVENTS_HEARTBEAT_SECONDS'])
+        return response, 503
+
+    try:
+        # One primary-key read per connection, to tell whether the replay log covers the gap
+        version = User.contacts_version_of(user.id) or 0
+        backlog = []
+        resync_since = None
+        if last_event_id is not None and last_event_id < version:
+            backlog, complete = contact_events.replay(user.id, last_event_id)
+            newest = max((event.id for event in backlog), default=last_event_id)
+            if not complete or newest < version:
+                backlog, resync_since = [], last_event_id
+    except Exception as e:
+        contact_events.unsubscribe(subscription)
+        logger.exception("Error opening contact event stream")
+        return jsonify({'error': str(e)}), 500
+
+    stream = event_stream(
+        subscription, backlog, resync_since,
+        current_app.config['CONTACT_EVENTS_HEARTBEAT_SECONDS'],
+        current_app.config['CONTACT_EVENTS_RETRY_MS']
+    )
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # let nginx pass events through as they are written
+    })
+    # Also covers clients that go away before the first frame is sent
+    response.call_on_close(lambda: contact_events.unsubscribe(subscription))
+    return response
+
 @simple_contacts_bp.route('/', methods=['GET'])
 def get_contacts():
-    """Get all contacts with pagination and search"""
-    print("=== SIMPLE GET CONTACTS ENDPOINT CALLED ===")
-    
+    """
+    Get all contacts with pagination and search.
+    Pass `cursor` (empty for the first page) to use keyset pagination;
+    otherwise `page` is used for offset pagination and search results
+    are ordered by relevance. Answers 304 to a matching If-None-Match
+    """
     # Authenticate user
     user, error = get_user_from_token(request)
     if not user:
         return jsonify({'error': error}), 401
     
     try:
+        # The tag only changes when one of the user's contacts does, so a
+        # revalidating poll costs a single primary-key lookup
+        etag = make_etag('contacts', user.id, User.contacts_version_of(user.id), sorted(request.args.items(multi=True)))
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
+        
+        if per_page < 1:
+            return jsonify({'error': 'per_page must be a positive integer'}), 400
         
         # Get contacts for this user
         query = Contact.query.filter_by(user_id=user.id)
         
         # Apply search if provided
+        rank = None
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    Contact.first_name.ilike(search_term),
-                    Contact.last_name.ilike(search_term),
-                    Contact.company.ilike(search_term),
-                    Contact.address.ilike(search_term)
+            query, rank = search_contacts(query, search)
+            
+        # Cursor mode: seek past the last row of the previous page instead of
+        # counting and skipping, so every page costs the same as the first
+        if cursor is not None:
+            if cursor:
+                position = decode_cursor(cursor)
+                if not position:
+                    return jsonify({'error': 'Invalid cursor'}), 400
+                query = query.filter(
+                    db.tuple_(Contact.first_name, Contact.last_name, Contact.id) > position
                 )
-            )
             
-        # Apply pagination
-        total = query.count()
-        contacts = query.order_by(Contact.first_name, Contact.last_name).offset((page-1)*per_page).limit(per_page).all()
+            # Fetch one extra row to find out whether there is a next page
+            contacts = query.order_by(Contact.first_name, Contact.last_name, Contact.id).limit(per_page + 1).all()
+            next_cursor = None
+            if len(contacts) > per_page:
+                contacts = contacts[:per_page]
+                last = contacts[-1]
+                next_cursor = encode_cursor(last.first_name, last.last_name, last.id)
+        else:
+            # Apply pagination, best matches first when searching the full-text index.
+            # Unfiltered listings read the maintained counter instead of COUNT(*)
+            if search:
+                total = query.count()
+            else:
+                total = db.session.query(User.contact_count).filter(User.id == user.id).scalar() or 0
+            if rank is not None:
+                query = query.order_by(rank, Contact.id)
+            else:
+                query = query.order_by(Contact.first_name, Contact.last_name, Contact.id)
+            contacts = query.offset((page-1)*per_page).limit(per_page).all()
+        
+        # Load the page's phone numbers with one IN query
+        phone_numbers = ContactPhone.numbers_for(contacts)
+        
+        contact_list = [
+            serialize_contact(contact, phone_numbers.get(contact.id, []))
+            for contact in contacts
+        ]
+        
+        if cursor is not None:
+            return json_response({
+                'contacts': contact_list,
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }, headers=cache_headers(etag))
         
         # Prepare response
         pages = (total + per_page - 1) // per_page  # ceiling division
-        
-        contact_list = []
-        for contact in contacts:
-            contact_list.append({
-                'id': contact.id,
-                'first_name': contact.first_name,
-                'last_name': contact.last_name,
-                'company': contact.company,
-                'address': contact.address,
-                'phone_numbers': contact.get_phone_numbers(),
-                'created_at': contact.created_at.isoformat()
-            })
             
-        return jsonify({
+        return json_response({
             'contacts': contact_list,
             'total': total,
             'pages': pages,
             'page': page,
             'per_page': per_page
-        }), 200
+        }, headers=cache_headers(etag))
             
     except Exception as e:
-        print(f"Error getting contacts: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error getting contacts")
         return jsonify({'error': str(e)}), 500
 
 @simple_contacts_bp.route('/<int:contact_id>', methods=['GET'])
 def get_contact(contact_id):
-    """Get a specific contact by ID"""
-    print(f"=== SIMPLE GET CONTACT {contact_id} ENDPOINT CALLED ===")
-    
+    """Get a specific contact by ID, or 304 if If-None-Match still matches"""
     # Authenticate user
     user, error = get_user_from_token(request)
     if not user:
         return jsonify({'error': error}), 401
     
     try:
+        # Check the tag against updated_at before loading the whole row
+        updated_at = db.session.query(Contact.updated_at).filter_by(id=contact_id, user_id=user.id).scalar()
+        if updated_at is None:
+            return jsonify({'error': 'Contact not found'}), 404
+        etag = make_etag('contact', contact_id, updated_at.isoformat())
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
         # Find contact
         contact = Contact.query.filter_by(id=contact_id, user_id=user.id).first()
         if not contact:
             return jsonify({'error': 'Contact not found'}), 404
             
         # Return contact details
-        return jsonify({
-            'id': contact.id,
-            'first_name': contact.first_name,
-            'last_name': contact.last_name,
-            'company': contact.company,
-            'address': contact.address,
-            'phone_numbers': contact.get_phone_numbers(),
-            'created_at': contact.created_at.isoformat(),
-            'updated_at': contact.updated_at.isoformat()
-        }), 200
+        return json_response(serialize_contact(contact, detail=True), headers=cache_headers(etag))
         
     except Exception as e:
-        print(f"Error getting contact: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error getting contact")
         return jsonify({'error': str(e)}), 500
 
 @simple_contacts_bp.route('/<int:contact_id>', methods=['DELETE'])
 def delete_contact(contact_id):
     """Delete a contact"""
-    print(f"=== SIMPLE DELETE CONTACT {contact_id} ENDPOINT CALLED ===")
-    
     # Authenticate user
     user, error = get_user_from_token(request)
     if not user:
@@ -203,25 +577,25 @@ def delete_contact(contact_id):
         if not contact:
             return jsonify({'error': 'Contact not found'}), 404
             
-        # Delete contact
+        # Delete contact, leaving a tombstone for delta sync
         db.session.delete(contact)
+        version = User.adjust_contact_count(user.id, -1)
+        ContactTombstone.record(user.id, [contact.id], version)
         db.session.commit()
+        invalidate_user_contacts(user.id)
+        publish_change(user.id, version, 'deleted', [contact_id])
         
         return jsonify({
             'message': 'Contact deleted successfully'
         }), 200
         
     except Exception as e:
-        print(f"Error deleting contact: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error deleting contact")
         return jsonify({'error': str(e)}), 500
 
 @simple_contacts_bp.route('/<int:contact_id>', methods=['PUT'])
 def update_contact(contact_id):
     """Update an existing contact"""
-    print(f"=== SIMPLE UPDATE CONTACT {contact_id} ENDPOINT CALLED ===")
-    
     # Authenticate user
     user, error = get_user_from_token(request)
     if not user:
@@ -235,14 +609,14 @@ def update_contact(contact_id):
             
         # Get post data
         post_data = request.get_json()
+        log_request_dump(logger, post_data)
         if not post_data:
             return jsonify({'error': 'No input data provided'}), 400
             
         # Validate required fields
-        required_fields = ['first_name', 'last_name']
-        for field in required_fields:
-            if field not in post_data or not post_data[field]:
-                return jsonify({'error': f'Field {field} is required'}), 400
+        error = validate_contact_data(post_data)
+        if error:
+            return jsonify({'error': error}), 400
                 
         # Update contact
         contact.first_name = post_data['first_name']
@@ -255,22 +629,160 @@ def update_contact(contact_id):
             contact.set_phone_numbers(post_data['phone_numbers'])
         
         # Save changes
+        contact.sync_version = User.bump_contacts_version(user.id)
         db.session.commit()
+        invalidate_user_contacts(user.id)
         
         # Return updated contact
+        publish_change(user.id, contact.sync_version, 'updated', [contact.id], contact)
+        return json_response(serialize_contact(contact, detail=True))
+        
+    except Exception as e:
+        logger.exception("Error updating contact")
+        return jsonify({'error': str(e)}), 500
+
+def bulk_selection(user_id, data):
+    """
+    Resolve a bulk request's `ids` list or `filter` object (`search` and/or
+    `company`) to a condition on the user's contacts.
+    Returns (condition, requested ids or None, error message)
+    """
+    ids = data.get('ids')
+    contact_filter = data.get('filter')
+    if (ids is None) == (contact_filter is None):
+        return None, None, 'Provide either ids or filter'
+    owned = Contact.user_id == user_id
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return None, None, 'ids must be a list of integers'
+        max_ids = current_app.config['CONTACT_BULK_MAX_IDS']
+        if len(ids) > max_ids:
+            return None, None, f'At most {max_ids} ids per request'
+        ids = list(dict.fromkeys(ids))  # drop duplicates, keep order
+        return db.and_(owned, Contact.id.in_(ids)), ids, None
+    
+    if not isinstance(contact_filter, dict) or not (contact_filter.get('search') or 'company' in contact_filter):
+        return None, None, 'filter needs search or company'
+    query = Contact.query.filter(owned)
+    if contact_filter.get('search'):
+        query, _ = search_contacts(query, contact_filter['search'])
+    if 'company' in contact_filter:
+        query = query.filter(Contact.company == contact_filter['company'])
+    return db.and_(owned, Contact.id.in_(query.with_entities(Contact.id).statement)), None, None
+
+def bulk_results(ids, affected, status):
+    """Per-id outcomes: `status` for affected ids, not_found for the rest"""
+    if ids is None:
+        return [{'id': contact_id, 'status': status} for contact_id in affected]
+    affected = set(affected)
+    return [{'id': contact_id, 'status': status if contact_id in affected else 'not_found'} for contact_id in ids]
+
+@simple_contacts_bp.route('/bulk-delete', methods=['POST'])
+def bulk_delete_contacts():
+    """
+    Delete the contacts chosen by `ids` or `filter` with set-based
+    statements in one transaction, reporting each id as deleted or not_found
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    try:
+        post_data = request.get_json(silent=True)
+        log_request_dump(logger, post_data)
+        if not post_data:
+            return jsonify({'error': 'No input data provided'}), 400
+        
+        condition, ids, error = bulk_selection(user.id, post_data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Phones first, while the contacts they hang off can still be selected
+        db.session.execute(
+            db.delete(ContactPhone)
+            .where(ContactPhone.contact_id.in_(db.select(Contact.id).where(condition)))
+            .execution_options(synchronize_session=False)
+        )
+        deleted = db.session.scalars(
+            db.delete(Contact).where(condition).returning(Contact.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if deleted:
+            version = User.adjust_contact_count(user.id, -len(deleted))
+            ContactTombstone.record(user.id, deleted, version)
+        db.session.commit()
+        invalidate_user_contacts(user.id)
+        if deleted:
+            publish_change(user.id, version, 'deleted', deleted)
+        
         return jsonify({
-            'id': contact.id,
-            'first_name': contact.first_name,
-            'last_name': contact.last_name,
-            'company': contact.company,
-            'address': contact.address,
-            'phone_numbers': contact.get_phone_numbers(),
-            'created_at': contact.created_at.isoformat(),
-            'updated_at': contact.updated_at.isoformat()
+            'deleted': len(deleted),
+            'results': bulk_results(ids, deleted, 'deleted')
         }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error bulk deleting contacts")
+        return jsonify({'error': str(e)}), 500
+
+# Columns a bulk update may set to the same value on many contacts
+BULK_UPDATE_FIELDS = ('first_name', 'last_name', 'company', 'address')
+
+@simple_contacts_bp.route('/bulk-update', methods=['POST'])
+def bulk_update_contacts():
+    """
+    Set the fields in `set` on the contacts chosen by `ids` or `filter` with
+    one UPDATE, reporting each id as updated or not_found
+    """
+    # Authenticate user
+    user, error = get_user_from_token(request)
+    if not user:
+        return jsonify({'error': error}), 401
+    
+    try:
+        post_data = request.get_json(silent=True)
+        log_request_dump(logger, post_data)
+        if not post_data:
+            return jsonify({'error': 'No input data provided'}), 400
         
+        values = post_data.get('set')
+        if not isinstance(values, dict) or not values:
+            return jsonify({'error': 'set must name at least one field'}), 400
+        unknown = sorted(set(values) - set(BULK_UPDATE_FIELDS))
+        if unknown:
+            return jsonify({'error': f"Fields that cannot be bulk updated: {', '.join(unknown)}"}), 400
+        for field, value in values.items():
+            if value is not None and not isinstance(value, str):
+                return jsonify({'error': f'Field {field} must be a string'}), 400
+        for field in ('first_name', 'last_name'):
+            if field in values and not values[field]:
+                return jsonify({'error': f'Field {field} is required'}), 400
+        
+        condition, ids, error = bulk_selection(user.id, post_data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # updated_at is set by the column's onupdate
+        version = User.bump_contacts_version(user.id)
+        updated = db.session.scalars(
+            db.update(Contact).where(condition).values(sync_version=version, **values).returning(Contact.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if updated:
+            db.session.commit()
+            publish_change(user.id, version, 'updated', updated)
+        else:
+            db.session.rollback()
+        invalidate_user_contacts(user.id)
+        
+        return jsonify({
+            'updated': len(updated),
+            'results': bulk_results(ids, updated, 'updated')
+        }), 200
+    
     except Exception as e:
-        print(f"Error updating contact: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        db.session.rollback()
+        logger.exception("Error bulk updating contacts")
+        return jsonify({'error': str(e)}), 500
@@ -1,3 +1,4 @@
 # Import models to make them available
 from app.models.user import User
-from app.models.contact import Contact
\ No newline at end of file
+from app.models.contact import Contact, ContactPhone, ContactTombstone
+from app.models.upload import Upload
@@ -1,11 +1,24 @@
 import json
+import logging
+from collections import defaultdict
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
 from app import db
+from app.utils.phones import normalize_phone, phone_list, phone_suffix, trailing_match_length
 from marshmallow import Schema, fields, validate
 
+logger = logging.getLogger(__name__)
+
 class Contact(db.Model):
     """Contact model for storing contact related details"""
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Listing filters on user_id and sorts by name (id breaks ties for cursors)
+        db.Index('ix_contacts_user_id_name', 'user_id', 'first_name', 'last_name', 'id'),
+        db.Index('ix_contacts_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_contacts_user_id_sync_version', 'user_id', 'sync_version', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -16,19 +29,245 @@ class Contact(db.Model):
     phone_numbers = db.Column(db.Text, nullable=False)  # Stored as JSON string
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # users.contacts_version of the write that last changed the row, for delta sync
+    sync_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Relationships
+    phones = db.relationship('ContactPhone', lazy=True, cascade='all, delete-orphan',
+                             order_by='ContactPhone.position')
     
     def get_phone_numbers(self):
-        """Return phone numbers as a list"""
-        return json.loads(self.phone_numbers)
+        """Return phone numbers as a list, [] if the stored JSON is unreadable"""
+        try:
+            return phone_list(self.phone_numbers)
+        except ValueError:
+            return []
     
     def set_phone_numbers(self, phone_list):
-        """Set phone numbers from a list"""
-        self.phone_numbers = json.dumps(phone_list)
+        """Set phone numbers from a list, keeping contact_phones in step"""
+        rows = ContactPhone.rows_for(None, self.user_id, phone_list)
+        self.phone_numbers = json.dumps(phone_list if phone_list is not None else [])
+        self.phones = [ContactPhone(**row) for row in rows]
     
     def __repr__(self):
         return f"<Contact {self.first_name} {self.last_name}>"
 
 
+class ContactPhone(db.Model):
+    """One phone number of a contact, with its E.164 form for lookups"""
+    __tablename__ = "contact_phones"
+    __table_args__ = (
+        db.Index('ix_contact_phones_user_id_normalized_number', 'user_id', 'normalized_number'),
+        db.Index('ix_contact_phones_contact_id', 'contact_id'),
+        db.Index('ix_contact_phones_user_id_number_suffix', 'user_id', 'number_suffix'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    contact_id = db.Column(db.Integer, db.ForeignKey('contacts.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Denormalized for per-user lookups
+    position = db.Column(db.Integer, nullable=False, default=0)
+    number = db.Column(db.String(50), nullable=False)  # As entered
+    normalized_number = db.Column(db.String(16), nullable=True)  # E.164, None if unparseable
+    number_suffix = db.Column(db.String(15), nullable=True)  # Trailing digits, for caller-ID matching
+    
+    @staticmethod
+    def rows_for(contact_id, user_id, phone_list):
+        """Column dicts for a contact's phone numbers, for ORM or bulk inserts"""
+        if phone_list is None:
+            phone_list = []
+        if not isinstance(phone_list, list):
+            raise TypeError('phone numbers must be a list')
+        country_code = current_app.config['DEFAULT_PHONE_COUNTRY_CODE']
+        suffix_length = current_app.config['PHONE_MATCH_SUFFIX_DIGITS']
+        rows = []
+        for position, number in enumerate(phone_list):
+            normalized = normalize_phone(number, country_code)
+            rows.append({
+                'contact_id': contact_id,
+                'user_id': user_id,
+                'position': position,
+                'number': str(number),
+                'normalized_number': normalized,
+                'number_suffix': phone_suffix(normalized, suffix_length)
+            })
+        return rows
+    
+    @staticmethod
+    def lookup(user_id, normalized, limit=10):
+        """
+        Resolve an E.164 number to the user's contacts through the indexes.
+        Exact matches win; otherwise contacts sharing at least
+        PHONE_MATCH_SUFFIX_DIGITS trailing digits are returned, longest
+        shared tail first (this catches numbers stored with the wrong or
+        no country code)
+        """
+        columns = (Contact.id, Contact.first_name, Contact.last_name, Contact.company, ContactPhone.normalized_number)
+        base = db.select(*columns).join(Contact, Contact.id == ContactPhone.contact_id).where(ContactPhone.user_id == user_id)
+        
+        rows = db.session.execute(base.where(ContactPhone.normalized_number == normalized).limit(limit)).all()
+        match = 'exact'
+        if not rows:
+            suffix_length = current_app.config['PHONE_MATCH_SUFFIX_DIGITS']
+            rows = db.session.execute(
+                base.where(ContactPhone.number_suffix == phone_suffix(normalized, suffix_length)).limit(limit * 10)
+            ).all()
+            rows.sort(key=lambda row: trailing_match_length(row.normalized_number, normalized), reverse=True)
+            rows = rows[:limit]
+            match = 'suffix'
+        
+        matches = []
+        seen = set()
+        for row in rows:
+            if row.id in seen:
+                continue
+            seen.add(row.id)
+            matches.append({
+                'id': row.id,
+                'first_name': row.first_name,
+                'last_name': row.last_name,
+                'company': row.company,
+                'phone_number': row.normalized_number,
+                'match': match
+            })
+        return matches
+    
+    @staticmethod
+    def numbers_for(contacts):
+        """
+        Phone numbers for a page of contacts with a single IN query.
+        Returns {contact_id: [number, ...]}; contacts whose phones have not
+        been backfilled yet fall back to their JSON column
+        """
+        numbers = defaultdict(list)
+        if not contacts:
+            return numbers
+        rows = db.session.execute(
+            db.select(ContactPhone.contact_id, ContactPhone.number)
+            .where(ContactPhone.contact_id.in_([contact.id for contact in contacts]))
+            .order_by(ContactPhone.contact_id, ContactPhone.position)
+        )
+        for contact_id, number in rows:
+            numbers[contact_id].append(number)
+        for contact in contacts:
+            if contact.id not in numbers and contact.phone_numbers != '[]':
+                numbers[contact.id] = contact.get_phone_numbers()
+        return numbers
+    
+    @staticmethod
+    def backfill(batch_size=1000):
+        """
+        Rebuild contact_phones from the JSON phone_numbers column, walking
+        contacts in id order and committing every batch_size contacts so
+        the app stays online. Safe to re-run. Returns the contacts processed
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            contacts = db.session.execute(
+                db.select(Contact.id, Contact.user_id, Contact.phone_numbers)
+                .where(Contact.id > last_id)
+                .order_by(Contact.id)
+                .limit(batch_size)
+            ).all()
+            if not contacts:
+                return processed
+            
+            contact_ids = [contact.id for contact in contacts]
+            db.session.execute(db.delete(ContactPhone).where(ContactPhone.contact_id.in_(contact_ids)))
+            rows = []
+            for contact in contacts:
+                try:
+                    numbers = phone_list(contact.phone_numbers)
+                except ValueError:
+                    # Skip rather than abort, so re-runs get past the row
+                    logger.warning("Skipping contact %s: unreadable phone_numbers %r", contact.id, contact.phone_numbers)
+                    continue
+                rows.extend(ContactPhone.rows_for(contact.id, contact.user_id, numbers))
+            if rows:
+                db.session.execute(db.insert(ContactPhone), rows)
+            db.session.commit()
+            
+            processed += len(contacts)
+            last_id = contact_ids[-1]
+    
+    def __repr__(self):
+        return f"<ContactPhone {self.normalized_number or self.number}>"
+
+
+class ContactTombstone(db.Model):
+    """Marker left by a deleted contact so delta sync can report the delete"""
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        db.Index('ix_contact_tombstones_user_id_sync_version', 'user_id', 'sync_version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    contact_id = db.Column(db.Integer, nullable=False)
+    sync_version = db.Column(db.Integer, nullable=False)  # users.contacts_version of the delete
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    @staticmethod
+    def record(user_id, contact_ids, version):
+        """Add tombstones for deleted contacts in the current transaction"""
+        if contact_ids:
+            db.session.execute(db.insert(ContactTombstone), [
+                {'user_id': user_id, 'contact_id': contact_id, 'sync_version': version, 'deleted_at': datetime.utcnow()}
+                for contact_id in contact_ids
+            ])
+    
+    def __repr__(self):
+        return f"<ContactTombstone {self.contact_id} v{self.sync_version}>"
+
+
+# Full-text index over the searchable contact columns (SQLite only).
+# It is an external-content FTS5 table kept in sync by triggers, so every
+# insert, update and delete on contacts - ORM or bulk SQL - updates it too.
+CONTACTS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        first_name, last_name, company, address,
+        content='contacts', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, first_name, last_name, company, address)
+        VALUES (new.id, new.first_name, new.last_name, new.company, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, company, address)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.company, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE OF first_name, last_name, company, address ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, company, address)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.company, old.address);
+        INSERT INTO contacts_fts(rowid, first_name, last_name, company, address)
+        VALUES (new.id, new.first_name, new.last_name, new.company, new.address);
+    END
+    """,
+]
+
+
+@event.listens_for(Contact.__table__, 'after_create')
+def create_contacts_fts(target, connection, **kw):
+    """Create the full-text index alongside the table when using db.create_all()"""
+    if connection.dialect.name == 'sqlite':
+        for statement in CONTACTS_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Contact.__table__, 'before_drop')
+def drop_contacts_fts(target, connection, **kw):
+    """Drop the full-text index before the table when using db.drop_all()"""
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS contacts_fts")
+
+
 class ContactSchema(Schema):
     """Schema for Contact model serialization and validation"""
     id = fields.Int(dump_only=True)
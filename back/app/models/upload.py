@@ -0,0 +1,97 @@
+import os
+from datetime import datetime
+from app import db
+
+
+class Upload(db.Model):
+    """A stored upload, shared by every record that references the same content"""
+    __tablename__ = "uploads"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    path = db.Column(db.String(100), unique=True, nullable=False)  # ab/cd/<sha256>.<ext>
+    size = db.Column(db.Integer, nullable=False)
+    # Records referencing the file; rows at zero are removed by prune()
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def acquire(path, size):
+        """Add a reference to a stored file in the current transaction"""
+        result = db.session.execute(
+            db.update(Upload).where(Upload.path == path).values(ref_count=Upload.ref_count + 1)
+        )
+        if result.rowcount == 0:
+            db.session.execute(db.insert(Upload).values(
+                path=path, size=size, ref_count=1, created_at=datetime.utcnow()
+            ))
+
+    @staticmethod
+    def release(path, connection=None):
+        """
+        Drop a reference in the current transaction (or on connection, from
+        flush events). The file stays on disk until prune() runs
+        """
+        statement = db.update(Upload).where(Upload.path == path).values(ref_count=Upload.ref_count - 1)
+        (connection or db.session).execute(statement)
+
+    @staticmethod
+    def prune(root, derived=lambda path: ()):
+        """
+        Delete unreferenced uploads: the row first, then the file and the
+        derived files named by derived(path). Returns the number removed.
+        Files are removed before the DELETE commits, so an acquire() of the
+        same path waits until the file is gone and then sees it missing
+        """
+        from app.utils.storage import remove_stored
+        removed = 0
+        paths = db.session.execute(db.select(Upload.path).where(Upload.ref_count <= 0)).scalars().all()
+        for path in paths:
+            # Re-check in the DELETE so a concurrent acquire() keeps the file
+            result = db.session.execute(
+                db.delete(Upload).where(Upload.path == path, Upload.ref_count <= 0)
+            )
+            if result.rowcount:
+                remove_stored(root, path, derived(path))
+                removed += 1
+            db.session.commit()
+        return removed
+
+    @staticmethod
+    def migrate_legacy(root, store, batch_size=100):
+        """
+        Move users' flat-folder profile pictures into content-addressed storage.
+        store(legacy_name) copies one legacy file in and returns (path, size),
+        or None if it is missing. Users are updated and references counted
+        per batch; legacy files are only deleted after their batch commits,
+        so the command can be interrupted and re-run.
+        Returns (migrated, missing, legacy names to delete)
+        """
+        from app.models.user import User
+        migrated = missing = 0
+        stored = {}
+        last_id = 0
+        while True:
+            users = db.session.execute(
+                db.select(User.id, User.profile_picture)
+                .where(User.id > last_id, User.profile_picture.is_not(None), ~User.profile_picture.contains('/'))
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+            if not users:
+                return migrated, missing, [legacy for legacy, result in stored.items() if result]
+
+            for user_id, legacy in users:
+                if legacy not in stored:
+                    stored[legacy] = store(legacy)
+                if stored[legacy] is None:
+                    missing += 1
+                    continue
+                path, size = stored[legacy]
+                db.session.execute(db.update(User).where(User.id == user_id).values(profile_picture=path))
+                Upload.acquire(path, size)
+                migrated += 1
+            db.session.commit()
+            last_id = users[-1].id
+
+    def __repr__(self):
+        return f"<Upload {os.path.basename(self.path)} refs={self.ref_count}>"
@@ -1,6 +1,11 @@
 import json
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
 from app import db, bcrypt
+from app.models.upload import Upload
+from app.utils.cache import principal_cache
+from app.utils.hashing import password_hasher, bcrypt_cost
 from marshmallow import Schema, fields, validate, validates, ValidationError
 from email_validator import validate_email, EmailNotValidError
 
@@ -19,6 +24,11 @@ class User(db.Model):
     address = db.Column(db.Text, nullable=False)
     profile_picture = db.Column(db.String(255), nullable=True)
     registered_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Denormalized number of contacts, kept in step by adjust_contact_count()
+    contact_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every change to the user's contacts; part of the listing ETags
+    # and stamped on changed rows as their sync version
+    contacts_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     contacts = db.relationship('Contact', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -29,10 +39,15 @@ class User(db.Model):
     
     @password.setter
     def password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.password_hash = password_hasher.run(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.run(bcrypt.check_password_hash, self.password_hash, password)
+    
+    def needs_rehash(self):
+        """True if the stored hash was made with a different BCRYPT_LOG_ROUNDS"""
+        return bcrypt_cost(self.password_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
     
     def get_phone_numbers(self):
         """Return phone numbers as a list"""
@@ -42,10 +57,69 @@ class User(db.Model):
         """Set phone numbers from a list"""
         self.phone_numbers = json.dumps(phone_list)
     
+    @staticmethod
+    def adjust_contact_count(user_id, delta):
+        """
+        Atomically add delta to a user's contact_count in the current transaction,
+        bumping contacts_version too. Call it next to the insert/delete so both commit together.
+        Returns the new contacts_version, to stamp on the changed rows
+        """
+        return db.session.execute(
+            db.update(User).where(User.id == user_id).values(
+                contact_count=User.contact_count + delta,
+                contacts_version=User.contacts_version + 1
+            ).returning(User.contacts_version)
+        ).scalar()
+    
+    @staticmethod
+    def bump_contacts_version(user_id):
+        """
+        Record a change to a user's contacts that leaves the count alone, e.g. an edit.
+        Returns the new contacts_version, to stamp on the changed rows
+        """
+        return db.session.execute(
+            db.update(User).where(User.id == user_id).values(
+                contacts_version=User.contacts_version + 1
+            ).returning(User.contacts_version)
+        ).scalar()
+    
+    @staticmethod
+    def contacts_version_of(user_id):
+        """Current contacts_version of a user (a primary-key lookup), or None"""
+        return db.session.query(User.contacts_version).filter(User.id == user_id).scalar()
+    
+    @staticmethod
+    def recount_contacts():
+        """Recompute every user's contact_count from the contacts table"""
+        from app.models.contact import Contact
+        actual = db.select(db.func.count(Contact.id)).where(Contact.user_id == User.id).scalar_subquery()
+        result = db.session.execute(
+            db.update(User).where(User.contact_count != actual).values(
+                contact_count=actual,
+                contacts_version=User.contacts_version + 1
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+    
     def __repr__(self):
         return f"<User {self.email}>"
 
 
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_principal(mapper, connection, target):
+    """Drop the cached authenticated user when the row changes"""
+    principal_cache.invalidate(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def release_profile_picture(mapper, connection, target):
+    """Drop the deleted user's reference to their stored profile picture"""
+    if target.profile_picture:
+        Upload.release(target.profile_picture, connection)
+
+
 class UserSchema(Schema):
     """Schema for User model serialization and validation"""
     id = fields.Int(dump_only=True)
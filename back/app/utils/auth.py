@@ -1,49 +1,175 @@
 import jwt
+import binascii
 import datetime
-import traceback
+import json
+import logging
+import time
+from collections import namedtuple
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import g, request, jsonify, current_app
+from jwt.utils import base64url_decode
+from app import db
 from app.models.user import User
+from app.utils.cache import principal_cache
 
-def generate_token(user_id):
+logger = logging.getLogger(__name__)
+
+# The user fields request handlers need after authentication
+Principal = namedtuple('Principal', ['id', 'email', 'first_name', 'last_name', 'profile_picture'])
+
+def load_principal(user_id):
+    """
+    Resolve an authenticated user id to a Principal, or None if the user
+    does not exist. Served from principal_cache when possible
+    """
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = db.session.query(
+            User.id, User.email, User.first_name, User.last_name, User.profile_picture
+        ).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        principal_cache.set(user_id, principal)
+    return principal
+
+class TokenSigner:
+    """
+    Signs and verifies HS256 access tokens.
+    The algorithm object and prepared key are built once and reused, so
+    verifying a token is a single HMAC plus two small JSON decodes
+    """
+
+    def __init__(self, secret, algorithm='HS256'):
+        self.algorithm = algorithm
+        self._algorithm = jwt.get_algorithm_by_name(algorithm)
+        self._key = self._algorithm.prepare_key(secret)
+
+    def encode(self, payload):
+        return jwt.encode(payload, self._key, algorithm=self.algorithm)
+
+    def decode(self, token):
+        """
+        Verify a token and return its payload.
+        Raises jwt.ExpiredSignatureError or jwt.InvalidTokenError
+        """
+        try:
+            header_segment, payload_segment, signature_segment = token.split('.')
+            header = json.loads(base64url_decode(header_segment))
+            if header.get('alg') != self.algorithm:
+                raise jwt.InvalidAlgorithmError('The specified alg value is not allowed')
+            signing_input = f"{header_segment}.{payload_segment}".encode('ascii')
+            signature = base64url_decode(signature_segment)
+            if not self._algorithm.verify(signing_input, self._key, signature):
+                raise jwt.InvalidSignatureError('Signature verification failed')
+            payload = json.loads(base64url_decode(payload_segment))
+        except (ValueError, TypeError, AttributeError, binascii.Error) as e:
+            raise jwt.DecodeError(str(e))
+        
+        if not isinstance(payload, dict) or not isinstance(payload.get('exp'), (int, float)):
+            raise jwt.DecodeError('Token has no valid expiry')
+        if payload['exp'] <= time.time():
+            raise jwt.ExpiredSignatureError('Signature has expired')
+        return payload
+
+# Signers keyed by (secret, algorithm) so config changes take effect
+_token_signers = {}
+
+def get_token_signer():
+    """
+    Return the cached TokenSigner for the current app's JWT settings
+    """
+    key = (current_app.config['JWT_SECRET_KEY'], current_app.config['JWT_ALGORITHM'])
+    signer = _token_signers.get(key)
+    if signer is None:
+        signer = _token_signers[key] = TokenSigner(*key)
+    return signer
+
+def generate_token(user_id, claims=None):
     """
     Generate JWT token for authentication
     """
     try:
         # Generate a JWT token with expiration
+        now = datetime.datetime.utcnow()
         payload = {
-            'exp': datetime.datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
-            'iat': datetime.datetime.utcnow(),
+            'exp': now + current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+            'iat': now,
             'sub': user_id
         }
-        return jwt.encode(
-            payload,
-            current_app.config['JWT_SECRET_KEY'],
-            algorithm='HS256'
-        )
+        if claims:
+            payload.update(claims)
+        return get_token_signer().encode(payload)
     except Exception as e:
-        print(f"Token generation error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Token generation failed")
         return str(e)
 
+def generate_user_token(user):
+    """
+    Generate a token carrying every Principal field, so it can be
+    trusted later without a database lookup
+    """
+    return generate_token(user.id, {
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'profile_picture': user.profile_picture
+    })
+
 def decode_token(auth_token):
     """
     Decode the JWT token
     """
     try:
-        payload = jwt.decode(
-            auth_token,
-            current_app.config['JWT_SECRET_KEY'],
-            algorithms=['HS256']
-        )
+        payload = get_token_signer().decode(auth_token)
         return payload['sub']
     except jwt.ExpiredSignatureError:
-        print("Token expired")
         return 'Token expired. Please log in again.'
-    except jwt.InvalidTokenError:
-        print("Invalid token")
+    except (jwt.InvalidTokenError, KeyError):
         return 'Invalid token. Please log in again.'
 
+def principal_from_token(token):
+    """
+    Authenticate a bearer token for the simple_* blueprints.
+    Signed tokens are trusted from their claims with no query; legacy
+    "test_token_{id}" tokens are only accepted when LEGACY_TEST_TOKENS is on.
+    Returns (principal, None) or (None, error message)
+    """
+    # Set by the batch endpoint, which authenticates once for all sub-requests
+    authenticated = g.get('authenticated')
+    if authenticated is not None and authenticated[0] == token:
+        g.user_id = authenticated[1].id
+        return authenticated[1], None
+    
+    if token.startswith('test_token_'):
+        if not current_app.config['LEGACY_TEST_TOKENS']:
+            return None, 'Invalid token format'
+        try:
+            user_id = int(token.split('_')[2])
+        except (IndexError, ValueError):
+            return None, 'Invalid token format'
+        g.user_id = user_id
+        principal = load_principal(user_id)
+        if not principal:
+            return None, 'User not found'
+        return principal, None
+    
+    try:
+        payload = get_token_signer().decode(token)
+        # Lets database routing keep this user's reads on the primary after a write
+        g.user_id = payload['sub']
+        return Principal(
+            id=payload['sub'],
+            email=payload['email'],
+            first_name=payload['first_name'],
+            last_name=payload['last_name'],
+            profile_picture=payload.get('profile_picture')
+        ), None
+    except jwt.ExpiredSignatureError:
+        return None, 'Token expired. Please log in again.'
+    except (jwt.InvalidTokenError, KeyError):
+        return None, 'Invalid token. Please log in again.'
+
 def token_required(f):
     """
     Decorator for routes that require authentication
@@ -53,19 +179,14 @@ def token_required(f):
         token = None
         auth_header = request.headers.get('Authorization')
         
-        print(f"Auth header: {auth_header}")
-        
         if auth_header:
             # Check if token has Bearer prefix
             if auth_header.startswith('Bearer '):
                 token = auth_header.split(' ')[1]
-                print(f"Found Bearer token: {token[:10]}...")
             else:
                 token = auth_header  # For backward compatibility
-                print(f"Found raw token: {token[:10]}...")
                 
         if not token:
-            print("No token provided")
             return jsonify({
                 'error': 'Token is missing'
             }), 401
@@ -74,24 +195,21 @@ def token_required(f):
             user_id = decode_token(token)
             # Check if token decoded to a string error message
             if isinstance(user_id, str):
-                print(f"Token decode error: {user_id}")
                 return jsonify({
                     'error': user_id
                 }), 401
                 
             # Get current user
-            current_user = User.query.get(user_id)
+            g.user_id = user_id
+            current_user = load_principal(user_id)
             if not current_user:
-                print(f"User not found for id: {user_id}")
+                logger.info("Token for missing user %s", user_id)
                 return jsonify({
                     'error': 'User not found'
                 }), 401
                 
-            print(f"Authentication successful for user: {current_user.email}")
-                
-        except Exception as e:
-            print(f"Authentication exception: {str(e)}")
-            print(traceback.format_exc())
+        except Exception:
+            logger.exception("Authentication failed")
             return jsonify({
                 'error': 'Invalid token'
             }), 401
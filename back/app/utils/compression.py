@@ -0,0 +1,138 @@
+import threading
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+
+class CompressionStats:
+    """Bytes before and after compression, per encoding, for this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, encoding, raw_bytes, sent_bytes):
+        with self._lock:
+            counters = self._counters.setdefault(encoding, {'responses': 0, 'raw_bytes': 0, 'sent_bytes': 0})
+            counters['responses'] += 1
+            counters['raw_bytes'] += raw_bytes
+            counters['sent_bytes'] += sent_bytes
+
+    def stats(self):
+        """Counters for monitoring, with the overall saving per encoding"""
+        with self._lock:
+            return {
+                encoding: dict(counters, ratio=round(counters['sent_bytes'] / counters['raw_bytes'], 3) if counters['raw_bytes'] else None)
+                for encoding, counters in self._counters.items()
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _compressor(encoding, config):
+    if encoding == 'br':
+        return _Brotli(config['COMPRESS_BROTLI_QUALITY'])
+    return _Gzip(config['COMPRESS_GZIP_LEVEL'])
+
+
+def _stream(iterable, compressor, encoding):
+    """Compress a streamed body chunk by chunk, flushing so each chunk reaches the client"""
+    raw_bytes = sent_bytes = 0
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            raw_bytes += len(chunk)
+            out = compressor.compress(chunk) + compressor.flush()
+            sent_bytes += len(out)
+            yield out
+        out = compressor.finish()
+        sent_bytes += len(out)
+        yield out
+        compression_stats.record(encoding, raw_bytes, sent_bytes)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def configure_compression(app):
+    """
+    Compress text responses with brotli or gzip, as negotiated through
+    Accept-Encoding. Small bodies, already-encoded responses and binary
+    content (e.g. uploaded images) are sent as they are
+    """
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in app.config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.cache_control.no_transform
+        ):
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        compressor = _compressor(encoding, app.config)
+        if response.is_streamed:
+            response.response = _stream(response.response, compressor, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            compressed = compressor.compress(data) + compressor.finish()
+            compression_stats.record(encoding, len(data), len(compressed))
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        # The body is no longer byte-identical to the uncompressed one
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
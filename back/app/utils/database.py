@@ -0,0 +1,136 @@
+import threading
+from collections import Counter
+from functools import partial
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+from app.utils.cache import TTLCache
+
+# Bind key of the optional read replica (REPLICA_DATABASE_URL)
+REPLICA_BIND = 'replica'
+
+# Users who committed a write recently; their reads stay on the primary
+recent_writers = TTLCache()
+
+# Requests served per engine ('primary', 'replica', or both) by this worker
+_routing_counts = Counter()
+_routing_lock = threading.Lock()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of read-only requests to the replica bind,
+    when one is configured. Flushes, INSERT/UPDATE/DELETE statements and all
+    other requests use the primary, as do reads by a user within
+    READ_YOUR_WRITES_SECONDS of their last commit
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        writing = self._flushing or isinstance(clause, UpdateBase)
+        if writing:
+            self.info['wrote'] = True
+        engine = None
+        if bind is None and not writing and not self.info.get('wrote') and _replica_allowed():
+            engine = self._db.engines.get(REPLICA_BIND)
+        if engine is None:
+            engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if has_request_context():
+            name = REPLICA_BIND if engine is self._db.engines.get(REPLICA_BIND) else 'primary'
+            g.setdefault('db_engines', set()).add(name)
+        return engine
+
+
+def _replica_allowed():
+    if not has_request_context() or not g.get('db_read_only'):
+        return False
+    user_id = g.get('user_id')
+    return user_id is None or recent_writers.get(user_id) is None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def remember_writer(session):
+    """Start the read-your-own-writes window for the user who committed"""
+    if session.info.pop('wrote', False) and has_request_context() and g.get('user_id') is not None:
+        recent_writers.set(g.user_id, True)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_write(session):
+    session.info.pop('wrote', None)
+
+
+def routing_stats():
+    """Requests per serving engine, for monitoring"""
+    with _routing_lock:
+        return dict(_routing_counts)
+
+
+def engine_options(config):
+    """
+    SQLAlchemy engine options for the configured database: connection
+    pool settings for server databases, nothing extra for SQLite.
+    Explicit SQLALCHEMY_ENGINE_OPTIONS entries take precedence
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+    if url.get_backend_name() != 'sqlite':
+        options.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_pre_ping=config['DB_POOL_PRE_PING'],
+            pool_recycle=config['DB_POOL_RECYCLE']
+        )
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record, pragmas):
+    """Apply SQLITE_PRAGMAS to a freshly opened SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_database(app, db):
+    """
+    Initialise db for the app with per-environment engine options, hook
+    SQLITE_PRAGMAS (WAL, synchronous, busy_timeout, ...) into every new
+    SQLite connection, and route GET/HEAD reads to REPLICA_DATABASE_URL
+    when it is set. Each response reports its engine(s) in X-DB-Engine
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    if app.config['REPLICA_DATABASE_URL']:
+        app.config['SQLALCHEMY_BINDS'] = dict(
+            app.config.get('SQLALCHEMY_BINDS') or {},
+            **{REPLICA_BIND: app.config['REPLICA_DATABASE_URL']}
+        )
+    db.init_app(app)
+    recent_writers.configure(maxsize=app.config['READ_YOUR_WRITES_MAX_USERS'], ttl=app.config['READ_YOUR_WRITES_SECONDS'])
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            pragmas = dict(app.config['SQLITE_PRAGMAS'])
+            if key == REPLICA_BIND:
+                pragmas['query_only'] = 1  # a replica is never written through the app
+            if pragmas:
+                event.listen(engine, 'connect', partial(set_sqlite_pragmas, pragmas=pragmas))
+
+    @app.before_request
+    def choose_database_route():
+        g.db_read_only = request.method in ('GET', 'HEAD')
+        g.pop('db_engines', None)
+
+    @app.after_request
+    def report_database_route(response):
+        served_by = ','.join(sorted(g.get('db_engines', ()))) or 'none'
+        response.headers['X-DB-Engine'] = served_by
+        with _routing_lock:
+            _routing_counts[served_by] += 1
+        return response
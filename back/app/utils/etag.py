@@ -0,0 +1,27 @@
+import hashlib
+from flask import Response, request
+from werkzeug.http import unquote_etag
+
+
+def make_etag(*parts):
+    """
+    Weak ETag built from the values a response depends on.
+    Weak because the body may be re-encoded (e.g. compressed) on the way out
+    """
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(etag):
+    """
+    Return a 304 response if the request's If-None-Match matches etag, else None.
+    Call before loading or serializing anything the tag describes
+    """
+    if request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+        return Response(status=304, headers=cache_headers(etag))
+    return None
+
+
+def cache_headers(etag):
+    """Headers telling clients to revalidate with If-None-Match on every poll"""
+    return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
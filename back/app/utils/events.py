@@ -0,0 +1,148 @@
+import bisect
+import logging
+import queue
+import threading
+from collections import OrderedDict, namedtuple
+from app.views.serializers import dumps, serialize_contact
+
+logger = logging.getLogger(__name__)
+
+# One encoded server-sent event; id is the contacts_version it was committed at
+ContactEvent = namedtuple('ContactEvent', ['id', 'frame'])
+
+
+def sse_frame(event_type, data, event_id=None):
+    """Encode one server-sent event"""
+    head = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{head}event: {event_type}\ndata: ".encode('utf-8') + dumps(data) + b"\n\n"
+
+
+class Subscription:
+    """One open event stream: a bounded queue of frames for a single user"""
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        # Set when the client fell queue_size events behind and missed some
+        self.overflowed = False
+
+
+class ContactEventBroker:
+    """
+    In-process fanout of contact changes to server-sent event streams.
+    Writers publish once after commit; each event is encoded once and
+    handed to the user's open streams, so no connection polls the database.
+    The last replay_size events per user (for max_users users) are kept so
+    a reconnecting client can resume from Last-Event-ID.
+    State is per worker process: streams only see writes made by the same worker
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, replay_size=100, max_users=10000, max_connections=100, queue_size=100):
+        """Set log and connection limits, e.g. from app config, and drop existing events"""
+        with self._lock:
+            self.replay_size = replay_size
+            self.max_users = max_users
+            self.max_connections = max_connections
+            self.queue_size = queue_size
+            # user id -> [highest id dropped from the log, sorted event ids, events in the same order]
+            self._logs = OrderedDict()
+            self._subscribers = {}
+            self._connections = 0
+            self.published = 0
+            self.rejected = 0
+            self.overflows = 0
+
+    def publish(self, user_id, event_id, event_type, data):
+        """Record a committed change and send it to the user's open streams"""
+        event = ContactEvent(event_id, sse_frame(event_type, dict(data, version=event_id), event_id))
+        with self._lock:
+            self.published += 1
+            log = self._logs.setdefault(user_id, [None, [], []])
+            self._logs.move_to_end(user_id)
+            # Concurrent commits can publish slightly out of version order
+            position = bisect.bisect_right(log[1], event_id)
+            log[1].insert(position, event_id)
+            log[2].insert(position, event)
+            if len(log[2]) > self.replay_size:
+                log[1].pop(0)
+                log[0] = log[2].pop(0).id
+            while len(self._logs) > self.max_users:
+                self._logs.popitem(last=False)
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        overflows = 0
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                if not subscription.overflowed:
+                    subscription.overflowed = True
+                    overflows += 1
+        if overflows:
+            with self._lock:
+                self.overflows += overflows
+
+    def replay(self, user_id, last_event_id):
+        """
+        Logged events after last_event_id, and whether they are complete,
+        i.e. nothing after last_event_id has been dropped from the log.
+        A user whose log was evicted looks like one with no events, so
+        callers compare the result with the user's current contacts_version
+        """
+        with self._lock:
+            floor, ids, events = self._logs.get(user_id, (None, [], []))
+            events = events[bisect.bisect_right(ids, last_event_id):]
+            return events, floor is None or floor <= last_event_id
+
+    def subscribe(self, user_id):
+        """Open a stream for user_id; returns a Subscription, or None at max_connections"""
+        with self._lock:
+            if self._connections >= self.max_connections:
+                self.rejected += 1
+                return None
+            self._connections += 1
+            subscription = Subscription(user_id, self.queue_size)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._connections -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'connections': self._connections,
+                'max_connections': self.max_connections,
+                'users_logged': len(self._logs),
+                'published': self.published,
+                'rejected': self.rejected,
+                'overflows': self.overflows
+            }
+
+
+contact_events = ContactEventBroker()
+
+
+def publish_change(user_id, event_id, event_type, ids, contact=None):
+    """
+    Publish a committed contact change to the feed. The write has already
+    committed, so failures here are logged rather than failing the request
+    """
+    try:
+        data = {'ids': list(ids)}
+        if contact is not None:
+            data['contact'] = serialize_contact(contact, detail=True)
+        contact_events.publish(user_id, event_id, event_type, data)
+    except Exception:
+        logger.exception("Could not publish %s event for user %s", event_type, user_id)
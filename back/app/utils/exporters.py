@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from app.utils.phones import phone_list
+
+# Flush streamed output in chunks of roughly this many characters
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = ['id', 'first_name', 'last_name', 'company', 'address', 'phone_numbers']
+
+
+def chunked(parts, size=EXPORT_CHUNK_SIZE):
+    """Join small string pieces into larger chunks to cut per-write overhead"""
+    buffer = []
+    buffered = 0
+    for part in parts:
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _phone_numbers(row):
+    """A row's phone numbers as strings, or none if the stored JSON is unreadable"""
+    try:
+        return phone_list(row.phone_numbers)
+    except ValueError:
+        return []
+
+
+def ndjson_lines(rows):
+    """One JSON object per contact row"""
+    for row in rows:
+        yield json.dumps({
+            'id': row.id,
+            'first_name': row.first_name,
+            'last_name': row.last_name,
+            'company': row.company,
+            'address': row.address,
+            'phone_numbers': _phone_numbers(row)
+        }) + '\n'
+
+
+def csv_lines(rows):
+    """CSV with a header row, in the same layout the import endpoint accepts"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row.id,
+            row.first_name,
+            row.last_name,
+            row.company or '',
+            row.address or '',
+            ';'.join(_phone_numbers(row))
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _vcard_escape(value):
+    """Escape a vCard 3.0 text value (RFC 2426)"""
+    return (value.replace('\\', '\\\\').replace(',', '\\,')
+            .replace(';', '\\;').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def vcard_lines(rows):
+    """One vCard 3.0 entry per contact row"""
+    for row in rows:
+        lines = [
+            'BEGIN:VCARD',
+            'VERSION:3.0',
+            f'N:{_vcard_escape(row.last_name)};{_vcard_escape(row.first_name)};;;',
+            f'FN:{_vcard_escape(row.first_name)} {_vcard_escape(row.last_name)}'
+        ]
+        if row.company:
+            lines.append(f'ORG:{_vcard_escape(row.company)}')
+        if row.address:
+            lines.append(f'ADR;TYPE=HOME:;;{_vcard_escape(row.address)};;;;')
+        for phone in _phone_numbers(row):
+            lines.append(f'TEL:{_vcard_escape(phone)}')
+        lines.append('END:VCARD')
+        yield '\r\n'.join(lines) + '\r\n'
+
+
+# format name -> (line generator, mimetype, file extension)
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson', 'ndjson'),
+    'csv': (csv_lines, 'text/csv', 'csv'),
+    'vcard': (vcard_lines, 'text/vcard', 'vcf')
+}
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingQueueFull(Exception):
+    """Raised when too many password hashes are already waiting"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt work on a small bounded thread pool.
+    bcrypt releases the GIL while hashing, so the pool caps how many cores
+    password checks can take at once, and a burst of logins is rejected
+    instead of starving every other request.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self.configure(max_workers, max_pending)
+
+    def configure(self, max_workers=None, max_pending=None):
+        """Set pool size and queue depth, e.g. from app config"""
+        with self._lock:
+            self.max_workers = max_workers or os.cpu_count() or 1
+            self.max_pending = max_pending or self.max_workers * 4
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='password-hasher'
+            )
+            self.completed = 0
+            self.rejected = 0
+            self.total_queue_wait = 0.0
+            self.max_queue_wait = 0.0
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool and wait for the result.
+        Raises HashingQueueFull when max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingQueueFull('Too many password operations in progress')
+            self._pending += 1
+            executor = self._executor
+
+        submitted_at = time.perf_counter()
+
+        def job():
+            self._record_wait(time.perf_counter() - submitted_at)
+            return fn(*args)
+
+        try:
+            return executor.submit(job).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record_wait(self, wait):
+        with self._lock:
+            self.completed += 1
+            self.total_queue_wait += wait
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+
+    def stats(self):
+        """Queue latency counters for monitoring"""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_queue_wait_ms': round(self.total_queue_wait / self.completed * 1000, 3) if self.completed else 0.0,
+                'max_queue_wait_ms': round(self.max_queue_wait * 1000, 3)
+            }
+
+
+password_hasher = PasswordHasher()
+
+
+def bcrypt_cost(password_hash):
+    """Return the log rounds encoded in a bcrypt hash such as $2b$12$..., or None"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional, originals are served as uploaded without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+
+def variant_format(preferred='WEBP'):
+    """(Pillow format, file extension) used for resized variants"""
+    if preferred == 'WEBP' and Image is not None and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def variant_filename(filename, size, extension):
+    """Name of the size px variant of an uploaded file, e.g. ab/cd/abcd...ef.64.webp"""
+    stem = filename.rsplit('.', 1)[0]
+    return f"{stem}.{size}.{extension}"
+
+
+def variant_filenames(filename, sizes):
+    """Every variant name a file may have, in either output format"""
+    return [variant_filename(filename, size, extension) for size in sizes for extension in ('webp', 'jpg')]
+
+
+def pick_variant(folder, filename, requested, sizes, preferred='WEBP'):
+    """
+    Name of the smallest variant at least `requested` px (or the largest one),
+    or None if it has not been generated yet and the original should be served
+    """
+    size = next((s for s in sorted(sizes) if s >= requested), max(sizes))
+    _, extension = variant_format(preferred)
+    name = variant_filename(filename, size, extension)
+    return name if os.path.exists(os.path.join(folder, name)) else None
+
+
+def make_variants(path, sizes, preferred='WEBP', quality=80):
+    """
+    Write a resized copy of the image at path for each size (longest side,
+    never upscaled). Variants are re-encoded from pixels only, so EXIF, GPS
+    and other metadata in the upload are not carried over
+    """
+    image_format, extension = variant_format(preferred)
+    folder, filename = os.path.split(path)
+    largest = max(sizes)
+
+    with Image.open(path) as original:
+        # Let the JPEG decoder downscale while decoding huge photos
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image_format == 'JPEG':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+    # Each smaller variant is resized from the previous one
+    for size in sorted(sizes, reverse=True):
+        image = image.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        image.info = {}
+        target = os.path.join(folder, variant_filename(filename, size, extension))
+        # Write then rename, so a half-written variant is never served
+        temporary = f"{target}.tmp"
+        image.save(temporary, image_format, quality=quality)
+        os.replace(temporary, target)
+
+
+class ImageProcessor:
+    """
+    Generates profile picture variants on a small background thread pool,
+    so uploads return as soon as the original is on disk
+    """
+
+    def __init__(self, max_workers=2):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.configure(max_workers)
+
+    def configure(self, max_workers=None, sizes=(64, 256, 1024), preferred='WEBP', quality=80):
+        """Set pool size and output settings, e.g. from app config"""
+        with self._lock:
+            self.max_workers = max_workers or 2
+            self.sizes = tuple(sizes)
+            self.preferred = preferred
+            self.quality = quality
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='image-processor'
+            )
+            self.pending = 0
+            self.completed = 0
+            self.failed = 0
+
+    def submit(self, path):
+        """Queue variant generation for an uploaded image; returns the future, or None without Pillow"""
+        if Image is None:
+            return None
+        with self._lock:
+            self.pending += 1
+            executor = self._executor
+        return executor.submit(self._process, path, self.sizes, self.preferred, self.quality)
+
+    def _process(self, path, sizes, preferred, quality):
+        try:
+            make_variants(path, sizes, preferred, quality)
+            succeeded = True
+        except Exception:
+            logger.exception("Could not create variants of %s", path)
+            succeeded = False
+        with self._lock:
+            self.pending -= 1
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'enabled': Image is not None,
+                'workers': self.max_workers,
+                'pending': self.pending,
+                'completed': self.completed,
+                'failed': self.failed
+            }
+
+
+image_processor = ImageProcessor()
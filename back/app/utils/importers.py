@@ -0,0 +1,49 @@
+import csv
+import json
+
+# Separator for multiple phone numbers in a single CSV cell
+CSV_PHONE_SEPARATOR = ';'
+
+
+def iter_csv_contacts(stream):
+    """
+    Yield (row_number, data, error) for each record of a CSV text stream
+    with a header row. phone_numbers may hold several numbers separated by ';'
+    """
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            phones = row.get('phone_numbers') or ''
+            yield reader.line_num, {
+                'first_name': (row.get('first_name') or '').strip(),
+                'last_name': (row.get('last_name') or '').strip(),
+                'company': (row.get('company') or '').strip() or None,
+                'address': (row.get('address') or '').strip() or None,
+                'phone_numbers': [phone.strip() for phone in phones.split(CSV_PHONE_SEPARATOR) if phone.strip()]
+            }, None
+    except (csv.Error, UnicodeDecodeError) as e:
+        # The rest of the stream cannot be parsed reliably
+        yield reader.line_num + 1, None, f'Malformed CSV: {e}'
+
+
+def iter_ndjson_contacts(stream):
+    """
+    Yield (row_number, data, error) for each line of a newline-delimited
+    JSON text stream. Blank lines are skipped
+    """
+    row_number = 0
+    try:
+        for row_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield row_number, None, 'Invalid JSON'
+                continue
+            if not isinstance(data, dict):
+                yield row_number, None, 'Row must be a JSON object'
+                continue
+            yield row_number, data, None
+    except UnicodeDecodeError as e:
+        yield row_number + 1, None, f'Invalid encoding: {e}'
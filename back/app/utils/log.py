@@ -0,0 +1,95 @@
+import atexit
+import logging
+import queue
+import random
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from flask import current_app, g, has_request_context, request
+
+# Never written to logs, even in debug request dumps
+REDACTED_HEADERS = {'authorization', 'cookie'}
+REDACTED_FIELDS = {'password', 'confirm_password'}
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request's correlation id"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue drained by a background thread.
+    When the queue is full the record is dropped rather than blocking the request
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(app):
+    """
+    Route the app's loggers through a non-blocking queue handler and
+    tag every request with a correlation id (X-Request-ID)
+    """
+    global _listener
+    app_logger = logging.getLogger('app')
+    app_logger.setLevel(app.config['LOG_LEVEL'])
+
+    if _listener is None:
+        log_queue = queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE'])
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = QueueListener(log_queue, stream_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        app_logger.addHandler(queue_handler)
+        app_logger.propagate = False
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        return response
+
+
+def redact(data):
+    """Copy of a request body with credential fields masked"""
+    if not isinstance(data, dict):
+        return data
+    return {key: ('[redacted]' if key in REDACTED_FIELDS else value) for key, value in data.items()}
+
+
+def log_request_dump(logger, body=None):
+    """
+    Log the request's headers and body at DEBUG for a sample of requests.
+    Does no formatting at all unless DEBUG is enabled for the logger
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= current_app.config['LOG_DEBUG_SAMPLE_RATE']:
+        return
+    headers = {
+        key: ('[redacted]' if key.lower() in REDACTED_HEADERS else value)
+        for key, value in request.headers.items()
+    }
+    logger.debug('%s %s headers=%s body=%s', request.method, request.path, headers, redact(body))
@@ -0,0 +1,54 @@
+import base64
+import json
+
+
+def _encode(values):
+    raw = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+
+
+def encode_cursor(first_name, last_name, contact_id):
+    """
+    Encode the sort key of the last row on a page into an opaque cursor
+    """
+    return _encode([first_name, last_name, contact_id])
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+    Returns a (first_name, last_name, id) tuple, or None if the cursor is invalid
+    """
+    try:
+        first_name, last_name, contact_id = _decode(cursor)
+        if not isinstance(first_name, str) or not isinstance(last_name, str) or not isinstance(contact_id, int):
+            return None
+        return first_name, last_name, contact_id
+    except (ValueError, TypeError):
+        return None
+
+
+def encode_sync_cursor(sync_version, contact_id):
+    """
+    Encode the (sync_version, id) of the last row on a delta sync page
+    """
+    return _encode([sync_version, contact_id])
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decode a cursor produced by encode_sync_cursor.
+    Returns a (sync_version, id) tuple, or None if the cursor is invalid
+    """
+    try:
+        sync_version, contact_id = _decode(cursor)
+        if not isinstance(sync_version, int) or not isinstance(contact_id, int):
+            return None
+        return sync_version, contact_id
+    except (ValueError, TypeError):
+        return None
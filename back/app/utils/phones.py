@@ -0,0 +1,70 @@
+import json
+import re
+
+_NON_DIGITS = re.compile(r'\D')
+
+# E.164 allows at most 15 digits after the '+'
+MAX_E164_DIGITS = 15
+MIN_E164_DIGITS = 4
+
+
+def normalize_phone(raw, default_country_code='1'):
+    """
+    Normalize a free-form phone number to E.164 (e.g. '+15551234567').
+    Numbers written without an international prefix ('+' or '00') are
+    assumed to be national numbers in default_country_code.
+    Returns None if the input does not look like a phone number
+    """
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    digits = _NON_DIGITS.sub('', raw)
+    if not digits:
+        return None
+
+    if raw.startswith('+'):
+        number = digits
+    elif digits.startswith('00'):
+        number = digits[2:]
+    else:
+        # Drop a national trunk prefix such as the leading 0 in 020 7946 0000
+        national = digits.lstrip('0')
+        if default_country_code and not (national.startswith(default_country_code) and len(national) > 10):
+            number = default_country_code + national
+        else:
+            number = national
+
+    if not MIN_E164_DIGITS <= len(number) <= MAX_E164_DIGITS:
+        return None
+    return '+' + number
+
+
+def phone_suffix(normalized, length):
+    """Last `length` digits of an E.164 number, used for trailing-digit matching"""
+    if not normalized:
+        return None
+    return normalized[1:][-length:]
+
+
+def trailing_match_length(a, b):
+    """Number of trailing digits two E.164 numbers have in common"""
+    matched = 0
+    for x, y in zip(reversed(a[1:]), reversed(b[1:])):
+        if x != y:
+            break
+        matched += 1
+    return matched
+
+
+def phone_list(raw):
+    """
+    Phone numbers from a stored phone_numbers JSON column, always as a list
+    of strings. Older rows may hold null (read as []) or a bare string (read
+    as one number). Raises ValueError if the column is not valid JSON
+    """
+    numbers = json.loads(raw) if raw is not None else None
+    if isinstance(numbers, str):
+        return [numbers] if numbers.strip() else []
+    if not isinstance(numbers, list):
+        return []
+    return [str(number) for number in numbers if number is not None]
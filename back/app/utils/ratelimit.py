@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class RateLimited(Exception):
+    """Raised when a request is turned away; retry_after is in whole seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by e.g. client IP: each key may spend `burst` tokens
+    at once, refilled at `rate` tokens per second. At most maxsize keys are
+    kept; the least recently used is evicted first, which only forgets a
+    bucket that has been idle the longest and has most likely refilled.
+    Safe to share between request threads.
+    """
+
+    def __init__(self, rate=1.0, burst=10, maxsize=10000):
+        self._lock = threading.Lock()
+        self.configure(rate, burst, maxsize)
+
+    def configure(self, rate=None, burst=None, maxsize=None):
+        """Change the limits, e.g. from app config, and drop existing buckets"""
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            if maxsize is not None:
+                self.maxsize = maxsize
+            self._buckets = OrderedDict()
+            self.allowed = 0
+            self.limited = 0
+            self.evictions = 0
+
+    def take(self, key):
+        """Spend one token for key; returns 0 if allowed, else seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return wait
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'keys': len(self._buckets),
+                'maxsize': self.maxsize,
+                'rate': self.rate,
+                'burst': self.burst,
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'evictions': self.evictions
+            }
+
+
+class LoginAdmission:
+    """
+    Admission control for password logins. Attempts are rate limited per
+    client IP before the body is read and per account before the user is
+    looked up, and at most max_verifications bcrypt checks for logins run
+    at once, leaving the rest of the hashing pool to registrations and
+    rehashes. Rejections are cheap and raise RateLimited
+    """
+
+    def __init__(self):
+        self.ips = TokenBuckets()
+        self.accounts = TokenBuckets()
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, ip_rate=1.0, ip_burst=20, account_rate=0.1, account_burst=5, max_keys=100000, max_verifications=16):
+        """Set limits, e.g. from app config"""
+        self.ips.configure(rate=ip_rate, burst=ip_burst, maxsize=max_keys)
+        self.accounts.configure(rate=account_rate, burst=account_burst, maxsize=max_keys)
+        with self._lock:
+            self.max_verifications = max_verifications
+            self._verifying = 0
+            self.verifications_rejected = 0
+
+    def admit_ip(self, ip):
+        wait = self.ips.take(ip)
+        if wait:
+            raise RateLimited('Too many login attempts, please retry later', wait)
+
+    def admit_account(self, email):
+        # Keyed on the normalised address, whether or not the account exists
+        wait = self.accounts.take(email.strip().lower())
+        if wait:
+            raise RateLimited('Too many login attempts, please retry later', wait)
+
+    @contextmanager
+    def verifying(self):
+        """Hold one of max_verifications password check slots, or raise RateLimited"""
+        with self._lock:
+            if self._verifying >= self.max_verifications:
+                self.verifications_rejected += 1
+                raise RateLimited('Server is busy, please retry shortly', 1)
+            self._verifying += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._verifying -= 1
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            verifications = {
+                'in_progress': self._verifying,
+                'max': self.max_verifications,
+                'rejected': self.verifications_rejected
+            }
+        return {
+            'ip': self.ips.stats(),
+            'account': self.accounts.stats(),
+            'verifications': verifications
+        }
+
+
+login_admission = LoginAdmission()
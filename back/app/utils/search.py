@@ -0,0 +1,66 @@
+from sqlalchemy import table, column
+from app import db
+from app.models.contact import Contact
+
+# Lightweight handle on the FTS5 table created alongside contacts
+contacts_fts = table('contacts_fts', column('rowid'), column('contacts_fts'), column('rank'))
+
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_FTS_TERM_LENGTH = 3
+
+# Cache of whether the full-text index exists, keyed by database URL
+_fts_available = {}
+
+
+def fts_available():
+    """
+    Check whether the current database has the contacts full-text index
+    """
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _fts_available:
+        available = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                available = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'"
+                ).first() is not None
+        _fts_available[key] = available
+    return _fts_available[key]
+
+
+def build_match_expression(search):
+    """
+    Turn free text into an FTS5 query matching every word as a substring.
+    Returns None if any word is too short for the trigram index
+    """
+    terms = search.split()
+    if not terms or any(len(term) < MIN_FTS_TERM_LENGTH for term in terms):
+        return None
+    # Quote each word so FTS5 operators in user input are matched literally
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_contacts(query, search):
+    """
+    Restrict a Contact query to rows matching `search`.
+    Returns (query, rank) where rank orders results by relevance, or
+    (query, None) when the index is unavailable and ILIKE was used instead
+    """
+    match = build_match_expression(search) if fts_available() else None
+    if match:
+        query = query.join(contacts_fts, contacts_fts.c.rowid == Contact.id).filter(
+            contacts_fts.c.contacts_fts.op('MATCH')(match)
+        )
+        return query, contacts_fts.c.rank
+
+    search_term = f"%{search}%"
+    query = query.filter(
+        db.or_(
+            Contact.first_name.ilike(search_term),
+            Contact.last_name.ilike(search_term),
+            Contact.company.ilike(search_term),
+            Contact.address.ilike(search_term)
+        )
+    )
+    return query, None
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import tempfile
+
+# Bytes read per step while hashing and copying an upload
+STORAGE_CHUNK_SIZE = 64 * 1024
+
+# Extensions that name the same format, so equal content gets one path
+CANONICAL_EXTENSIONS = {'jpeg': 'jpg'}
+
+
+def content_path(digest, extension):
+    """Sharded path of stored content relative to the upload folder, e.g. ab/cd/abcd...ef.jpg"""
+    extension = extension.lower()
+    extension = CANONICAL_EXTENSIONS.get(extension, extension)
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def is_content_path(name):
+    """True for names written by store_stream, False for legacy flat upload names"""
+    return '/' in name
+
+
+def store_stream(stream, extension, root):
+    """
+    Copy a readable binary stream into content-addressed storage under root,
+    hashing it (SHA-256) while it is written. Identical content is stored once.
+    Returns (path, size, created) where created is False for a duplicate
+    """
+    incoming = os.path.join(root, '.incoming')
+    os.makedirs(incoming, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temporary = tempfile.mkstemp(dir=incoming)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        path = content_path(digest.hexdigest(), extension)
+        target = os.path.join(root, path)
+        if os.path.exists(target):
+            return path, size, False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Same filesystem, so the file appears complete or not at all
+        os.replace(temporary, target)
+        temporary = None
+        return path, size, True
+    finally:
+        if temporary is not None:
+            os.remove(temporary)
+
+
+def remove_stored(root, path, extra=()):
+    """Delete a stored file and the given derived files (e.g. variants), ignoring missing ones"""
+    for name in (path, *extra):
+        try:
+            os.remove(os.path.join(root, name))
+        except FileNotFoundError:
+            pass
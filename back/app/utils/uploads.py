@@ -0,0 +1,52 @@
+import mimetypes
+import os
+from urllib.parse import quote
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+
+def send_upload(filename, immutable=True):
+    """
+    Serve a file from UPLOAD_FOLDER with long-lived cache headers.
+    Upload names carry a random prefix and are never rewritten, so they are
+    marked immutable; pass immutable=False for responses that may change
+    (an original standing in for a variant that is not generated yet).
+
+    UPLOADS_SENDFILE selects who sends the bytes:
+    - None: this worker, with conditional (ETag/Last-Modified) and Range support
+    - 'x-sendfile': Apache/lighttpd via the X-Sendfile header
+    - 'x-accel': nginx via X-Accel-Redirect to an `internal` location at
+      UPLOADS_ACCEL_PREFIX that aliases the upload folder
+    """
+    config = current_app.config
+    folder = os.path.join(current_app.root_path, config['UPLOAD_FOLDER'])
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    max_age = config['UPLOADS_MAX_AGE'] if immutable else config['UPLOADS_FALLBACK_MAX_AGE']
+    mode = config['UPLOADS_SENDFILE']
+
+    if mode == 'x-accel':
+        # nginx handles conditional and Range requests for the internal location
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = f"{config['UPLOADS_ACCEL_PREFIX'].rstrip('/')}/{quote(filename)}"
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response = send_file(
+            path,
+            request.environ,
+            conditional=True,
+            etag=True,
+            max_age=max_age,
+            use_x_sendfile=mode == 'x-sendfile',
+            response_class=current_app.response_class
+        )
+
+    if immutable:
+        response.cache_control.immutable = True
+    return response
@@ -1,7 +1,9 @@
 import os
-from werkzeug.utils import secure_filename
 from flask import current_app
 from dateutil import parser
+from app.models.upload import Upload
+from app.utils.images import image_processor
+from app.utils.storage import store_stream
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
@@ -14,21 +16,26 @@ def allowed_file(filename):
 
 def save_image(file):
     """
-    Save an image file to the upload folder
+    Save an image file to content-addressed storage in the upload folder
+    and reference it in the current transaction. Returns the stored path
+    (ab/cd/<sha256>.<ext>); identical images share one file
     """
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Create a unique filename to avoid overwriting
-        unique_filename = f"{os.urandom(8).hex()}_{filename}"
+        extension = file.filename.rsplit('.', 1)[1].lower()
+        root = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
         
-        # Ensure upload folder exists
-        os.makedirs(os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER']), exist_ok=True)
+        # Hash while streaming to disk; a duplicate is discarded
+        path, size, created = store_stream(file.stream, extension, root)
+        Upload.acquire(path, size)
+        if not created and not os.path.isfile(os.path.join(root, path)):
+            # prune() removed the duplicate's file before our reference
+            # landed; the reference now keeps it, so write it again
+            file.stream.seek(0)
+            path, size, created = store_stream(file.stream, extension, root)
+        if created:
+            image_processor.submit(os.path.join(root, path))
         
-        # Save the file
-        file_path = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-        
-        return unique_filename
+        return path
     return None
 
 def validate_date(date_string):
@@ -38,4 +45,20 @@ def validate_date(date_string):
     try:
         return parser.parse(date_string).date()
     except (ValueError, TypeError):
-        return None
\ No newline at end of file
+        return None
+
+def validate_contact_data(data):
+    """
+    Check a contact payload against the create/update rules.
+    Returns an error message, or None if the data is valid
+    """
+    required_fields = ['first_name', 'last_name']
+    for field in required_fields:
+        if field not in data or not data[field]:
+            return f'Field {field} is required'
+    # A string would otherwise be stored one character per phone number
+    if 'phone_numbers' in data:
+        phone_numbers = data['phone_numbers']
+        if not isinstance(phone_numbers, list) or not all(isinstance(phone, str) for phone in phone_numbers):
+            return 'Field phone_numbers must be a list of strings'
+    return None
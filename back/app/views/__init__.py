@@ -1,3 +1,3 @@
 # Views package initialization
 # Since this is a REST API, view logic is minimal
-# Response formatting happens directly in the controllers
\ No newline at end of file
+# Shared response serializers live in app.views.serializers
@@ -0,0 +1,65 @@
+import json
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def serialize_contact(contact, phone_numbers=None, detail=False):
+    """
+    Response dict for a contact. Pass phone_numbers when they were loaded
+    in bulk (see ContactPhone.numbers_for) to skip decoding the JSON column.
+    detail adds updated_at, as returned by the single-contact endpoints
+    """
+    data = {
+        'id': contact.id,
+        'first_name': contact.first_name,
+        'last_name': contact.last_name,
+        'company': contact.company,
+        'address': contact.address,
+        'phone_numbers': contact.get_phone_numbers() if phone_numbers is None else phone_numbers,
+        'created_at': contact.created_at.isoformat()
+    }
+    if detail:
+        data['updated_at'] = contact.updated_at.isoformat()
+    return data
+
+
+def serialize_user(user):
+    """Response dict for the registering or logging-in user"""
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'profile_picture': user.profile_picture,
+        'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
+        'gender': user.gender,
+        'address': user.address,
+        'phone_numbers': user.get_phone_numbers()
+    }
+
+
+def serialize_principal(principal):
+    """Response dict for an authenticated Principal (token claims)"""
+    return {
+        'id': principal.id,
+        'first_name': principal.first_name,
+        'last_name': principal.last_name,
+        'email': principal.email,
+        'profile_picture': principal.profile_picture
+    }
+
+
+def dumps(payload):
+    """Encode a payload to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200, headers=None):
+    """Build a JSON response in one encoding pass, bypassing jsonify"""
+    return Response(dumps(payload), status=status, headers=headers, mimetype='application/json')
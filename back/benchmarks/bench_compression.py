@@ -0,0 +1,42 @@
+"""
+Size and CPU cost of compressing contact list payloads.
+
+Encodes pages of 10, 50 and 1000 contacts the way get_contacts does and
+reports compressed size and time per response for several gzip levels
+(and brotli qualities when the brotli package is installed), to pick
+COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY and COMPRESS_MIN_SIZE.
+Live savings are reported under "compression" by /api/metrics.
+
+Run from the back/ directory:
+    python -m benchmarks.bench_compression
+"""
+import timeit
+import zlib
+
+from app import create_app
+from app.utils.compression import brotli
+from app.views.serializers import dumps, serialize_contact
+from benchmarks.bench_serializers import PAGE_SIZES, make_contacts
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 5, 11)
+
+
+def main():
+    app = create_app('testing')
+    with app.app_context():
+        for size in PAGE_SIZES:
+            body = dumps({'contacts': [serialize_contact(c) for c in make_contacts(size)]})
+            number = max(5, 2000 // size)
+            print(f'\n{size} contacts, {len(body)} bytes uncompressed')
+            candidates = [(f'gzip -{level}', lambda level=level: zlib.compress(body, level)) for level in GZIP_LEVELS]
+            if brotli is not None:
+                candidates += [(f'br q{quality}', lambda quality=quality: brotli.compress(body, quality=quality)) for quality in BROTLI_QUALITIES]
+            for name, fn in candidates:
+                best = min(timeit.repeat(fn, number=number, repeat=3))
+                compressed = len(fn())
+                print(f'  {name:<9} {compressed:8d} bytes ({compressed / len(body):5.1%}) {best / number * 1e6:9.1f} us')
+
+
+if __name__ == '__main__':
+    main()
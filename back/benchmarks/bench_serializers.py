@@ -0,0 +1,80 @@
+"""
+Microbenchmark for contact list serialization.
+
+Compares the previous hand-built dict + jsonify path, marshmallow
+ContactSchema + jsonify, and app.views.serializers.json_response on
+pages of 10, 50 and 1000 contacts.
+
+Run from the back/ directory:
+    python -m benchmarks.bench_serializers
+"""
+import json
+import timeit
+from datetime import datetime
+
+from flask import jsonify
+
+from app import create_app
+from app.models.contact import Contact, ContactSchema
+from app.views.serializers import json_response, orjson, serialize_contact
+
+PAGE_SIZES = (10, 50, 1000)
+
+
+def make_contacts(count):
+    now = datetime.utcnow()
+    contacts = []
+    for i in range(count):
+        contact = Contact(
+            id=i + 1,
+            user_id=1,
+            first_name=f'First{i}',
+            last_name=f'Last{i}',
+            company='Acme Corporation',
+            address=f'{i} Main Street, Springfield',
+            phone_numbers=json.dumps([f'+1555000{i:04d}', f'+1555100{i:04d}']),
+            created_at=now,
+            updated_at=now
+        )
+        contacts.append(contact)
+    return contacts
+
+
+def hand_built(contacts):
+    contact_list = []
+    for contact in contacts:
+        contact_list.append({
+            'id': contact.id,
+            'first_name': contact.first_name,
+            'last_name': contact.last_name,
+            'company': contact.company,
+            'address': contact.address,
+            'phone_numbers': contact.get_phone_numbers(),
+            'created_at': contact.created_at.isoformat()
+        })
+    return jsonify({'contacts': contact_list}).get_data()
+
+
+def marshmallow_schema(contacts, schema=ContactSchema(many=True)):
+    return jsonify({'contacts': schema.dump(contacts)}).get_data()
+
+
+def fast(contacts):
+    return json_response({'contacts': [serialize_contact(c) for c in contacts]}).get_data()
+
+
+def main():
+    app = create_app('testing')
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib json)'}")
+    with app.app_context():
+        for size in PAGE_SIZES:
+            contacts = make_contacts(size)
+            number = max(10, 20000 // size)
+            print(f'\n{size} contacts, {number} runs')
+            for name, fn in (('jsonify', hand_built), ('marshmallow', marshmallow_schema), ('json_response', fast)):
+                best = min(timeit.repeat(lambda: fn(contacts), number=number, repeat=5))
+                print(f'  {name:<14} {best / number * 1e6:10.1f} us/response')
+
+
+if __name__ == '__main__':
+    main()
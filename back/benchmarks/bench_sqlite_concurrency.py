@@ -0,0 +1,96 @@
+"""
+Concurrent read/write throughput on a file-backed SQLite database,
+with SQLite's defaults (rollback journal, synchronous=FULL) versus the
+tuned SQLITE_PRAGMAS from app.config (WAL, synchronous=NORMAL, ...).
+
+Each thread loops over the contacts API for a fixed time, creating a
+contact on WRITE_RATIO of its requests and listing a page otherwise.
+Errors are non-2xx responses, e.g. "database is locked".
+
+Run from the back/ directory:
+    python -m benchmarks.bench_sqlite_concurrency
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.config import Config, TestingConfig, config_by_name
+
+THREADS = 8
+DURATION = 5  # seconds per mode
+WRITE_RATIO = 0.2
+
+MODES = {
+    'sqlite defaults': {},
+    'tuned pragmas': dict(Config.SQLITE_PRAGMAS)
+}
+
+
+def run(name, pragmas, directory):
+    path = os.path.join(directory, f"{name.replace(' ', '_')}.db")
+    config_by_name['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLITE_PRAGMAS': pragmas,
+        'DB_POOL_SIZE': THREADS
+    })
+    app = create_app('benchmark')
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    response = client.post('/api/simple_auth/register', json={
+        'first_name': 'Bench', 'last_name': 'User', 'email': 'bench@example.com',
+        'password': 'secret1', 'gender': 'Other', 'phone_numbers': ['+15550000000'],
+        'address': 'Nowhere', 'date_of_birth': '1990-01-01'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + DURATION
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = app.test_client()
+        reads = writes = errors = 0
+        while time.monotonic() < deadline:
+            if rng.random() < WRITE_RATIO:
+                response = local.post('/api/simple_contacts/', headers=headers, json={
+                    'first_name': f'First{rng.randrange(10**6)}', 'last_name': 'Bench',
+                    'phone_numbers': [f'+1555{rng.randrange(10**7):07d}']
+                })
+                writes += 1
+            else:
+                response = local.get('/api/simple_contacts/?per_page=20', headers=headers)
+                reads += 1
+            if response.status_code >= 300:
+                errors += 1
+        with lock:
+            counts['reads'] += reads
+            counts['writes'] += writes
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = counts['reads'] + counts['writes']
+    print(f"{name:<16} {total / DURATION:8.1f} req/s  reads={counts['reads']} writes={counts['writes']} errors={counts['errors']}")
+    with app.app_context():
+        db.engine.dispose()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        print(f'{THREADS} threads, {DURATION}s per mode, {WRITE_RATIO:.0%} writes')
+        for name, pragmas in MODES.items():
+            run(name, pragmas, directory)
+
+
+if __name__ == '__main__':
+    main()
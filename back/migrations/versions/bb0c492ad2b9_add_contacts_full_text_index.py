@@ -0,0 +1,66 @@
+"""Add contacts full-text index
+
+Revision ID: bb0c492ad2b9
+Revises: 82cab0a7cb2c
+Create Date: 2026-10-17 10:03:27.554912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bb0c492ad2b9'
+down_revision = '82cab0a7cb2c'
+branch_labels = None
+depends_on = None
+
+
+# FTS5 is SQLite-specific; other databases keep using ILIKE search
+def _is_sqlite():
+    return op.get_bind().dialect.name == 'sqlite'
+
+
+def upgrade():
+    if not _is_sqlite():
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE contacts_fts USING fts5(
+            first_name, last_name, company, address,
+            content='contacts', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, first_name, last_name, company, address)
+            VALUES (new.id, new.first_name, new.last_name, new.company, new.address);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, company, address)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.company, old.address);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER contacts_fts_au AFTER UPDATE OF first_name, last_name, company, address ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, company, address)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.company, old.address);
+            INSERT INTO contacts_fts(rowid, first_name, last_name, company, address)
+            VALUES (new.id, new.first_name, new.last_name, new.company, new.address);
+        END
+    """)
+
+    # Index the contacts that already exist
+    op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if not _is_sqlite():
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS contacts_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS contacts_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS contacts_fts_ai")
+    op.execute("DROP TABLE IF EXISTS contacts_fts")
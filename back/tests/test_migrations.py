@@ -0,0 +1,76 @@
+"""
+Migration round trips on SQLite. Batch operations rebuild a table on
+SQLite and silently drop its triggers, which would leave the contacts_fts
+search index no longer tracking contact writes.
+
+Run from the back/ directory:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+from flask_migrate import downgrade, upgrade
+
+from app import create_app, db
+from app.config import TestingConfig, config_by_name
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+FTS_TRIGGERS = ['contacts_fts_ad', 'contacts_fts_ai', 'contacts_fts_au']
+
+
+@pytest.fixture
+def app(tmp_path):
+    config_by_name['migrations'] = type('MigrationsConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'migrations.db'}"
+    })
+    app = create_app('migrations')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def triggers():
+    db.session.remove()
+    rows = db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"))
+    return [name for name, in rows]
+
+
+def search_count(term):
+    return db.session.execute(
+        db.text("SELECT count(*) FROM contacts_fts WHERE contacts_fts MATCH :term"), {'term': term}
+    ).scalar()
+
+
+def test_fts_triggers_survive_round_trip(app):
+    upgrade(directory=MIGRATIONS)
+    assert triggers() == FTS_TRIGGERS
+
+    downgrade(directory=MIGRATIONS, revision='bb0c492ad2b9')
+    assert triggers() == FTS_TRIGGERS
+
+    upgrade(directory=MIGRATIONS)
+    assert triggers() == FTS_TRIGGERS
+
+
+def test_search_tracks_writes_after_round_trip(app):
+    upgrade(directory=MIGRATIONS)
+    downgrade(directory=MIGRATIONS, revision='bb0c492ad2b9')
+    upgrade(directory=MIGRATIONS)
+    db.session.remove()
+
+    db.session.execute(db.text(
+        "INSERT INTO users (first_name, last_name, email, password_hash, gender, phone_numbers, address, date_of_birth, registered_on)"
+        " VALUES ('A', 'B', 'a@example.com', 'x', 'Other', '[]', 'x', '1990-01-01', CURRENT_TIMESTAMP)"
+    ))
+    db.session.execute(db.text(
+        "INSERT INTO contacts (user_id, first_name, last_name, phone_numbers, created_at, updated_at)"
+        " VALUES (1, 'Margaret', 'Hamilton', '[]', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+    ))
+    db.session.commit()
+    assert search_count('Margaret') == 1
+
+    db.session.execute(db.text("UPDATE contacts SET first_name = 'Grace' WHERE id = 1"))
+    db.session.commit()
+    assert search_count('Margaret') == 0
+    assert search_count('Grace') == 1
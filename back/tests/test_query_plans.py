@@ -0,0 +1,76 @@
+"""
+EXPLAIN QUERY PLAN checks for the contact list queries, so a change that
+drops or bypasses ix_contacts_user_id_name (falling back to a full scan
+of contacts) fails here instead of in production.
+
+Run from the back/ directory:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+from flask_migrate import upgrade
+
+from app import create_app, db
+from app.config import TestingConfig, config_by_name
+from app.models.contact import Contact
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+INDEX = 'USING INDEX ix_contacts_user_id_name'
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    path = tmp_path_factory.mktemp('plans') / 'plans.db'
+    config_by_name['query_plans'] = type('QueryPlansConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'
+    })
+    app = create_app('query_plans')
+    with app.app_context():
+        # Build the schema from the migrations, which is what production runs
+        upgrade(directory=MIGRATIONS)
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def query_plan(query):
+    """EXPLAIN QUERY PLAN details for an ORM query"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def assert_uses_index(plan):
+    assert any(detail.startswith('SEARCH contacts') and INDEX in detail for detail in plan), plan
+    assert not any(detail.startswith('SCAN contacts') for detail in plan), plan
+
+
+def test_list_page_uses_index(app):
+    query = (Contact.query.filter_by(user_id=1)
+             .order_by(Contact.first_name, Contact.last_name, Contact.id)
+             .limit(21))
+    assert_uses_index(query_plan(query))
+
+
+def test_cursor_seek_uses_index(app):
+    query = (Contact.query.filter_by(user_id=1)
+             .filter(db.tuple_(Contact.first_name, Contact.last_name, Contact.id) > ('Ann', 'Lee', 42))
+             .order_by(Contact.first_name, Contact.last_name, Contact.id)
+             .limit(21))
+    assert_uses_index(query_plan(query))
+
+
+def test_offset_page_uses_index(app):
+    query = (Contact.query.filter_by(user_id=1)
+             .order_by(Contact.first_name, Contact.last_name, Contact.id)
+             .offset(40).limit(20))
+    assert_uses_index(query_plan(query))
+
+
+def test_count_uses_index(app):
+    query = db.session.query(db.func.count(Contact.id)).filter(Contact.user_id == 1)
+    # SQLite counts through whichever user_id-leading index is smallest,
+    # so only the absence of a full scan is asserted here
+    plan = query_plan(query)
+    assert any(detail.startswith('SEARCH contacts') and 'INDEX' in detail for detail in plan), plan
+    assert not any(detail.startswith('SCAN contacts') for detail in plan), plan
@@ -14,7 +14,8 @@ const Header = () => {
   // Get profile picture URL
   const getProfilePictureUrl = () => {
     if (userData && userData.profile_picture) {
-      return `http://localhost:5000/uploads/${userData.profile_picture}`;
+      // 65px avatar, doubled for high-DPI screens
+      return `http://localhost:5000/uploads/${userData.profile_picture}?size=130`;
     }
     return null;
   };